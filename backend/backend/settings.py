@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "corsheaders",
     "rest_framework",
     "rest_framework_simplejwt",
@@ -63,6 +64,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "study.audit.AuditBufferMiddleware",
 ]
 
 ROOT_URLCONF = "backend.urls"
@@ -138,6 +140,10 @@ STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Archived activity and audit log partitions (see study.partitions). Holds
+# every user's history, so it must stay outside MEDIA_ROOT, which is served
+# publicly.
+ARCHIVE_ROOT = Path(os.getenv("ARCHIVE_ROOT", BASE_DIR / "archives"))
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -158,3 +164,23 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "study.pagination.StandardResultsSetPagination",
     "PAGE_SIZE": 50,
 }
+
+
+# Shared AI model client (see study.ai_client). BACKEND may be a dotted path
+# to a factory returning a client, e.g. a local fake in tests.
+AI_CLIENT = {
+    "BACKEND": os.getenv("AI_CLIENT_BACKEND") or None,
+    "TIMEOUT_SECONDS": float(os.getenv("AI_CLIENT_TIMEOUT_SECONDS", "30")),
+    "MAX_RETRIES": int(os.getenv("AI_CLIENT_MAX_RETRIES", "2")),
+    "BACKOFF_SECONDS": float(os.getenv("AI_CLIENT_BACKOFF_SECONDS", "0.5")),
+    "MAX_CONCURRENCY": int(os.getenv("AI_CLIENT_MAX_CONCURRENCY", "4")),
+    "ACQUIRE_TIMEOUT_SECONDS": float(
+        os.getenv("AI_CLIENT_ACQUIRE_TIMEOUT_SECONDS", "5")
+    ),
+}
+
+# AI grading result cache (see study.ai_cache).
+AI_CACHE = {
+    "LRU_SIZE": int(os.getenv("AI_CACHE_LRU_SIZE", "1024")),
+    "TTL_SECONDS": int(os.getenv("AI_CACHE_TTL_SECONDS", str(30 * 24 * 3600))),
+}
@@ -0,0 +1,11 @@
+import os
+
+# Exports stream for as long as the data takes to serialize. With threaded
+# workers the worker keeps heartbeating while a thread streams, so
+# ``timeout`` only catches a hung process, not a long response.
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "300"))
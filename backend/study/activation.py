@@ -0,0 +1,48 @@
+from django.db.models import prefetch_related_objects
+
+from .models import Card
+
+# Picks the first ``limit`` groups of inactive cards by their earliest card
+# and activates every inactive card in them, in one statement. Cards without
+# a group id form a group of their own. The recheck of ``level`` and
+# ``next_review_time`` on the updated row makes a concurrent call skip cards
+# another call has just activated instead of activating and logging them
+# twice.
+ACTIVATE_SQL = """
+WITH candidates AS (
+    SELECT id, created_at,
+           COALESCE(NULLIF(btrim(group_id), ''), 'id:' || id) AS group_key
+    FROM {table}
+    WHERE box_id = %s AND user_id = %s AND level = 0
+      AND next_review_time IS NULL
+),
+chosen AS (
+    SELECT group_key FROM (
+        SELECT DISTINCT ON (group_key) group_key, created_at, id
+        FROM candidates
+        ORDER BY group_key, created_at, id
+    ) AS firsts
+    ORDER BY created_at, id
+    LIMIT %s
+)
+UPDATE {table} AS card
+SET level = 1, next_review_time = %s
+FROM candidates
+JOIN chosen USING (group_key)
+WHERE card.id = candidates.id
+  AND card.level = 0 AND card.next_review_time IS NULL
+RETURNING card.*, candidates.group_key
+"""
+
+
+def activate_box_cards(box, user, count, now):
+    """Activate the first ``count`` groups of inactive cards in ``box``.
+
+    Returns the activated cards, oldest first, each with its ``group_key``.
+    Their other fields hold the values after activation.
+    """
+    sql = ACTIVATE_SQL.format(table=Card._meta.db_table)
+    cards = list(Card.objects.raw(sql, [box.id, user.id, count, now]))
+    cards.sort(key=lambda card: (card.created_at, card.id))
+    prefetch_related_objects(cards, "content")
+    return cards
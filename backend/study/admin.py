@@ -1,12 +1,18 @@
 from django.contrib import admin
 from .models import (
+    ActivityRollup,
+    AiCacheEntry,
+    AiJob,
     Box,
+    BoxStats,
     Card,
     CardActivity,
     CardAuditLog,
+    CardContent,
     AiReviewLog,
     Exercise,
     ExerciseHistory,
+    SchedulerParameters,
 )
 
 
@@ -23,6 +29,23 @@ class BoxAdmin(admin.ModelAdmin):
     )
     search_fields = ("name", "user__email")
     list_filter = ("created_at",)
+    list_select_related = ("user",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_card_counts()
+
+
+@admin.register(BoxStats)
+class BoxStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        "box",
+        "total_cards",
+        "finished_cards",
+        "active_cards",
+        "updated_at",
+    )
+    search_fields = ("box__name",)
+    list_select_related = ("box",)
 
 
 @admin.register(Card)
@@ -31,6 +54,13 @@ class CardAdmin(admin.ModelAdmin):
     search_fields = ("box__name", "group_id", "user__email")
     list_filter = ("finished", "level", "is_important")
 
+
+@admin.register(CardContent)
+class CardContentAdmin(admin.ModelAdmin):
+    list_display = ("id", "hash", "created_at")
+    search_fields = ("hash",)
+
+
 @admin.register(CardActivity)
 class CardActivityAdmin(admin.ModelAdmin):
     list_display = ("id", "card", "user", "action", "card_level", "created_at")
@@ -38,6 +68,14 @@ class CardActivityAdmin(admin.ModelAdmin):
     list_filter = ("action", "created_at")
 
 
+@admin.register(ActivityRollup)
+class ActivityRollupAdmin(admin.ModelAdmin):
+    list_display = ("day", "user", "box", "action", "card_level", "count")
+    search_fields = ("user__email", "box__name")
+    list_filter = ("action", "day")
+    list_select_related = ("user", "box")
+
+
 @admin.register(CardAuditLog)
 class CardAuditLogAdmin(admin.ModelAdmin):
     list_display = ("id", "card", "user", "action", "created_at")
@@ -64,3 +102,24 @@ class ExerciseHistoryAdmin(admin.ModelAdmin):
     list_display = ("id", "exercise", "user", "created_at")
     search_fields = ("exercise__title", "user__email")
     list_filter = ("created_at",)
+
+
+@admin.register(SchedulerParameters)
+class SchedulerParametersAdmin(admin.ModelAdmin):
+    list_display = ("user", "sample_count", "fitted_at")
+    search_fields = ("user__email",)
+    list_select_related = ("user",)
+
+
+@admin.register(AiJob)
+class AiJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "user", "attempts", "created_at")
+    search_fields = ("user__email",)
+    list_filter = ("kind", "status", "created_at")
+
+
+@admin.register(AiCacheEntry)
+class AiCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "hits", "created_at", "expires_at")
+    search_fields = ("key",)
+    list_filter = ("kind", "expires_at")
@@ -0,0 +1,116 @@
+from .ai_cache import cache_key, get_cache, normalize_answer
+from .ai_client import get_provider
+from .ai_models import (
+    ExerciseItems,
+    ExerciseReview,
+    Review,
+    prompt_ai_review,
+    prompt_exercise_questions,
+)
+from .models import AiReviewLog, Card, Exercise, ExerciseHistory
+
+MODEL_NAME = "gemini-3-flash-preview"
+# Bump when prompts or response schemas change so cached results are not reused.
+PROMPT_VERSION = 1
+
+
+def _generate(prompt: str, schema):
+    response = get_provider().generate_content(
+        model=MODEL_NAME,
+        contents=prompt,
+        config={
+            "response_mime_type": "application/json",
+            "response_json_schema": schema.model_json_schema(),
+        },
+    )
+    return schema.model_validate_json(response.text)
+
+
+def review_answer(card: Card, answer: str) -> dict:
+    task = card.config["validate_answer_promt"]
+    prompt = f"""
+        {prompt_ai_review}
+
+        ==================
+        task details:
+        {task}
+
+        ==================
+        user input:
+        {answer}
+        """
+    key = cache_key(
+        "ai_review", task, normalize_answer(answer), PROMPT_VERSION, MODEL_NAME
+    )
+    return get_cache().get_or_compute(
+        "ai_review", key, lambda: _generate(prompt, Review).model_dump()
+    )
+
+
+def evaluate_answer(exercise: Exercise, question: str, answer: str) -> dict:
+    question = question.strip()
+    prompt = f"""
+        evaluation prompt:
+        {exercise.evaluate_prompt}
+
+        ==================
+        question:
+        {question}
+
+        ==================
+        user input:
+        {answer}
+        """
+    key = cache_key(
+        "exercise_evaluate",
+        exercise.evaluate_prompt,
+        question,
+        normalize_answer(answer),
+        PROMPT_VERSION,
+        MODEL_NAME,
+    )
+    return get_cache().get_or_compute(
+        "exercise_evaluate",
+        key,
+        lambda: _generate(prompt, ExerciseReview).model_dump(),
+    )
+
+
+def generate_exercises(exercise: Exercise) -> list[str]:
+    prompt = f"""
+        {prompt_exercise_questions}
+
+        ==================
+        exercise prompt:
+        {exercise.question_making_prompt}
+
+        ==================
+        instructions:
+        Generate 10 exercises for the topic that I give you.
+        """
+    return _generate(prompt, ExerciseItems).exercises
+
+
+def run_ai_review(user, card: Card, answer: str, card_level=None) -> dict:
+    review_data = review_answer(card, answer)
+    AiReviewLog.objects.create(
+        user=user,
+        card=card,
+        card_level=card.level if card_level is None else card_level,
+        answer=answer,
+        review=review_data,
+    )
+    return review_data
+
+
+def run_exercise_evaluation(user, exercise: Exercise, question: str, answer: str):
+    review_data = evaluate_answer(exercise, question, answer)
+    ExerciseHistory.objects.create(
+        user=user,
+        exercise=exercise,
+        question=question,
+        answer=answer,
+        review=review_data,
+        score=review_data.get("score", 0),
+    )
+    return review_data
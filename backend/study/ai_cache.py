@@ -0,0 +1,134 @@
+import hashlib
+import json
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AiCacheEntry
+
+DEFAULTS = {
+    "LRU_SIZE": 1024,
+    "TTL_SECONDS": 30 * 24 * 3600,
+}
+
+
+def normalize_answer(answer: str) -> str:
+    """Cache key form of an answer.
+
+    Unifies the Unicode form, line endings and trailing whitespace only;
+    indentation and line breaks can change the grade of code or poems.
+    """
+    lines = unicodedata.normalize("NFC", answer).splitlines()
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def cache_key(kind: str, *parts) -> str:
+    payload = json.dumps([kind, *parts], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AiResultCache:
+    """Two-tier cache for AI grading results.
+
+    A bounded in-process LRU sits in front of ``AiCacheEntry`` rows. Both
+    tiers honour the same expiry; expired rows are removed by the
+    ``purge_ai_cache`` command.
+    """
+
+    def __init__(self, options=None):
+        self.options = {**DEFAULTS, **(options or {})}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+    @classmethod
+    def from_settings(cls):
+        return cls(getattr(settings, "AI_CACHE", {}))
+
+    def get_or_compute(self, kind: str, key: str, compute):
+        now = timezone.now()
+        result = self._get_memory(key, now)
+        if result is not None:
+            self._record("memory_hits")
+            return result
+
+        entry = (
+            AiCacheEntry.objects.filter(key=key, expires_at__gt=now)
+            .values("result", "expires_at")
+            .first()
+        )
+        if entry is not None:
+            AiCacheEntry.objects.filter(key=key).update(hits=F("hits") + 1)
+            self._set_memory(key, entry["result"], entry["expires_at"])
+            self._record("db_hits")
+            return entry["result"]
+
+        self._record("misses")
+        result = compute()
+        expires_at = now + timedelta(seconds=self.options["TTL_SECONDS"])
+        try:
+            with transaction.atomic():
+                AiCacheEntry.objects.update_or_create(
+                    key=key,
+                    defaults={"kind": kind, "result": result, "expires_at": expires_at},
+                )
+        except IntegrityError:
+            # Another worker stored the same key concurrently.
+            pass
+        self._set_memory(key, result, expires_at)
+        return result
+
+    def _get_memory(self, key, now):
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            result, expires_at = cached
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def _set_memory(self, key, result, expires_at):
+        with self._lock:
+            self._entries[key] = (result, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.options["LRU_SIZE"]:
+                self._entries.popitem(last=False)
+
+    def _record(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._entries)
+        lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+        hits = stats["memory_hits"] + stats["db_hits"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> AiResultCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AiResultCache.from_settings()
+    return _cache
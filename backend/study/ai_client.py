@@ -0,0 +1,224 @@
+import os
+import random
+import threading
+import time
+
+import httpx
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils.module_loading import import_string
+from google import genai
+from google.genai import errors as genai_errors
+from rest_framework.exceptions import APIException
+
+DEFAULTS = {
+    "BACKEND": None,
+    "TIMEOUT_SECONDS": 30.0,
+    "MAX_RETRIES": 2,
+    "BACKOFF_SECONDS": 0.5,
+    "MAX_BACKOFF_SECONDS": 8.0,
+    "MAX_CONCURRENCY": 4,
+    "ACQUIRE_TIMEOUT_SECONDS": 5.0,
+    "MAX_CONNECTIONS": 10,
+    # First key of the advisory locks backing the concurrency slots.
+    "SLOT_LOCK_KEY": 0x41494331,
+}
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class AiUnavailable(APIException):
+    status_code = 503
+    default_detail = "The AI service is busy. Try again later."
+    default_code = "ai_unavailable"
+
+
+def _default_backend(options):
+    return genai.Client(
+        http_options=genai.types.HttpOptions(
+            timeout=int(options["TIMEOUT_SECONDS"] * 1000),
+            client_args={
+                "limits": httpx.Limits(
+                    max_connections=options["MAX_CONNECTIONS"],
+                    max_keepalive_connections=options["MAX_CONNECTIONS"],
+                )
+            },
+        )
+    )
+
+
+def _is_retryable(exc):
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, genai_errors.APIError):
+        return exc.code in RETRYABLE_STATUS_CODES
+    return False
+
+
+class AdvisoryLockSlots:
+    """Cross-process pool of ``size`` slots held as Postgres advisory locks.
+
+    Slot ``n`` is the session-level lock ``(key, n)``, so the cap holds for
+    every web and AI worker process sharing the database, whatever the
+    gunicorn worker class. A slot held by a process that dies is freed with
+    its connection.
+    """
+
+    poll_seconds = 0.05
+
+    def __init__(self, size, key):
+        self.size = size
+        self.key = key
+
+    def acquire(self, timeout):
+        """Take a free slot and return its number, or ``None`` on timeout."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with connection.cursor() as cursor:
+                # One lock call per statement: Postgres may evaluate a
+                # locking function on more rows than a LIMIT returns.
+                for slot in random.sample(range(self.size), self.size):
+                    cursor.execute(
+                        "SELECT pg_try_advisory_lock(%s, %s)", [self.key, slot]
+                    )
+                    if cursor.fetchone()[0]:
+                        return slot
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_seconds)
+
+    def release(self, slot):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s, %s)", [self.key, slot])
+        except DatabaseError:
+            # Inside an aborted transaction; the lock goes with the
+            # connection when Django closes it after the request or job.
+            pass
+
+
+class AiClientProvider:
+    """Process-wide model client with pooling, retries and a concurrency cap.
+
+    ``MAX_CONCURRENCY`` bounds model calls in flight across all processes
+    (see ``AdvisoryLockSlots``); a call waits up to
+    ``ACQUIRE_TIMEOUT_SECONDS`` for a slot before failing with
+    ``AiUnavailable``.
+
+    The underlying client (and its HTTP connection pool) is created lazily
+    and recreated after a fork, so gunicorn and AI workers never share
+    sockets with their parent. ``backend`` is a callable returning an object
+    with ``models.generate_content``; tests can swap it with ``set_backend``.
+    """
+
+    def __init__(self, options=None, backend=None):
+        self.options = {**DEFAULTS, **(options or {})}
+        self._backend = backend
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._slots = AdvisoryLockSlots(
+            self.options["MAX_CONCURRENCY"], self.options["SLOT_LOCK_KEY"]
+        )
+        self.reset_stats()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, "AI_CLIENT", {})
+        backend = options.get("BACKEND")
+        if isinstance(backend, str):
+            backend = import_string(backend)
+        return cls(options=options, backend=backend)
+
+    def set_backend(self, backend):
+        with self._lock:
+            self._backend = backend
+            self._client = None
+
+    def client(self):
+        pid = os.getpid()
+        if self._client is None or self._pid != pid:
+            with self._lock:
+                if self._client is None or self._pid != pid:
+                    backend = self._backend or _default_backend
+                    self._client = backend(self.options)
+                    self._pid = pid
+        return self._client
+
+    def generate_content(self, **kwargs):
+        slot = self._slots.acquire(timeout=self.options["ACQUIRE_TIMEOUT_SECONDS"])
+        if slot is None:
+            self._record(rejected=1)
+            raise AiUnavailable()
+        try:
+            return self._generate_with_retries(kwargs)
+        finally:
+            self._slots.release(slot)
+
+    def _generate_with_retries(self, kwargs):
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                response = self.client().models.generate_content(**kwargs)
+            except Exception as exc:
+                self._record(errors=1, latency=time.monotonic() - started)
+                if attempt >= self.options["MAX_RETRIES"] or not _is_retryable(exc):
+                    raise
+                attempt += 1
+                self._record(retries=1)
+                backoff = min(
+                    self.options["BACKOFF_SECONDS"] * 2 ** (attempt - 1),
+                    self.options["MAX_BACKOFF_SECONDS"],
+                )
+                time.sleep(backoff * random.uniform(0.5, 1.0))
+                continue
+            self._record(calls=1, latency=time.monotonic() - started)
+            return response
+
+    def _record(self, calls=0, errors=0, retries=0, rejected=0, latency=None):
+        with self._stats_lock:
+            self._stats["calls"] += calls
+            self._stats["errors"] += errors
+            self._stats["retries"] += retries
+            self._stats["rejected"] += rejected
+            if latency is not None:
+                latency_ms = latency * 1000
+                self._stats["latency_ms_total"] += latency_ms
+                self._stats["latency_ms_max"] = max(
+                    self._stats["latency_ms_max"], latency_ms
+                )
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {
+                "calls": 0,
+                "errors": 0,
+                "retries": 0,
+                "rejected": 0,
+                "latency_ms_total": 0.0,
+                "latency_ms_max": 0.0,
+            }
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        attempts = stats["calls"] + stats["errors"]
+        stats["latency_ms_avg"] = (
+            stats["latency_ms_total"] / attempts if attempts else 0.0
+        )
+        stats["pid"] = os.getpid()
+        return stats
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> AiClientProvider:
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = AiClientProvider.from_settings()
+    return _provider
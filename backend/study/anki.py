@@ -0,0 +1,225 @@
+import csv
+import html
+import itertools
+import json
+import mimetypes
+import re
+import shutil
+import sqlite3
+import tempfile
+import zipfile
+
+from django.core.files import File
+
+from uploads.models import Upload
+
+from .imports import decode_lines
+
+ANKI_CARD_TYPES = ("standard", "word-standard", "spelling")
+# Collections in the legacy format; ``collection.anki21b`` (zstd) is not
+# readable without extra dependencies.
+COLLECTION_NAMES = ("collection.anki21", "collection.anki2")
+ARCHIVE_SUFFIXES = (".apkg", ".colpkg")
+SEPARATORS = {
+    "tab": "\t",
+    "comma": ",",
+    "semicolon": ";",
+    "pipe": "|",
+    "space": " ",
+    "colon": ":",
+}
+NOTE_FIELD_SEPARATOR = "\x1f"
+
+_SOUND = re.compile(r"\[sound:([^\]]+)\]")
+_LINE_BREAK = re.compile(r"<br\s*/?>|</div>|</p>", re.IGNORECASE)
+_TAG = re.compile(r"<[^>]+>")
+
+
+class AnkiImportError(Exception):
+    pass
+
+
+def field_text(value: str) -> str:
+    """Plain text of an Anki field: sounds removed, HTML flattened.
+
+    Images go with the rest of the markup; ``<img>`` media are not stored.
+    """
+    value = _SOUND.sub("", value)
+    value = _TAG.sub("", _LINE_BREAK.sub("\n", value))
+    lines = (line.strip() for line in html.unescape(value).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def field_sound(value: str):
+    match = _SOUND.search(value)
+    return match.group(1) if match else None
+
+
+class MediaUploads:
+    """Copies media referenced by notes into the user's uploads, once each."""
+
+    def __init__(self, user, open_media=None, url_for=None):
+        self.user = user
+        self.open_media = open_media
+        self.url_for = url_for or (lambda upload: upload.file.url)
+        self.urls = {}
+
+    def url(self, filename):
+        if not filename or self.open_media is None:
+            return None
+        if filename not in self.urls:
+            self.urls[filename] = self._store(filename)
+        return self.urls[filename]
+
+    def _store(self, filename):
+        handle = self.open_media(filename)
+        if handle is None:
+            return None
+        with handle:
+            file = File(handle, name=filename)
+            upload = Upload.objects.create(
+                user=self.user,
+                file=file,
+                original_name=filename,
+                content_type=mimetypes.guess_type(filename)[0] or "",
+                size=file.size,
+            )
+        return self.url_for(upload)
+
+
+def note_payload(fields, card_type, language, media):
+    """Card config for a note's fields, taken in order (front, back, extra)."""
+    front_raw = fields[0] if fields else ""
+    back_raw = fields[1] if len(fields) > 1 else ""
+    front, back = field_text(front_raw), field_text(back_raw)
+    if not front:
+        raise ValueError("The first field is empty.")
+    if not back and card_type != "spelling":
+        raise ValueError("The second field is empty.")
+    front_voice = media.url(field_sound(front_raw))
+    back_voice = media.url(field_sound(back_raw))
+
+    if card_type == "standard":
+        config = {"type": "standard", "front": front, "back": back}
+        if front_voice:
+            config["front_voice_file_url"] = front_voice
+        if back_voice:
+            config["back_voice_file_url"] = back_voice
+        return config
+
+    if card_type == "word-standard":
+        part_of_speech = field_text(fields[2]) if len(fields) > 2 else ""
+        if not part_of_speech:
+            raise ValueError("The third field (part of speech) is empty.")
+        config = {
+            "type": "word-standard",
+            "word": front,
+            "back": back,
+            "part_of_speech": part_of_speech,
+        }
+    else:
+        config = {"type": "spelling", "spelling": front}
+        if back:
+            config["front"] = back
+    voice = front_voice or back_voice
+    if voice:
+        config["voice_file_url"] = voice
+    else:
+        config["text_to_speech"] = front
+        config["text_to_speech_language"] = language
+    return config
+
+
+def apkg_notes(archive_file, user, url_for=None):
+    """Yield ``(fields, media)`` for every note of an ``.apkg`` archive.
+
+    The collection is spooled to a temporary file for SQLite and read with
+    a cursor; media members are only opened when a note references them.
+    """
+    try:
+        archive = zipfile.ZipFile(archive_file)
+    except zipfile.BadZipFile:
+        raise AnkiImportError("The file is not a valid Anki package.")
+    with archive:
+        names = set(archive.namelist())
+        collection = next((name for name in COLLECTION_NAMES if name in names), None)
+        if collection is None:
+            raise AnkiImportError(
+                "Unsupported Anki package; export it with "
+                "'Support older Anki versions' enabled."
+            )
+        members = {}
+        if "media" in names:
+            try:
+                members = {
+                    filename: member
+                    for member, filename in json.loads(archive.read("media")).items()
+                    if member in names
+                }
+            except ValueError:
+                members = {}
+
+        def open_media(filename):
+            member = members.get(filename)
+            return archive.open(member) if member is not None else None
+
+        media = MediaUploads(user, open_media, url_for)
+        with tempfile.NamedTemporaryFile(suffix=".anki2") as database:
+            with archive.open(collection) as source:
+                shutil.copyfileobj(source, database)
+            database.flush()
+            connection = sqlite3.connect(database.name)
+            try:
+                for (flds,) in connection.execute("SELECT flds FROM notes ORDER BY id"):
+                    yield flds.split(NOTE_FIELD_SEPARATOR), media
+            except sqlite3.DatabaseError:
+                raise AnkiImportError("The Anki collection could not be read.")
+            finally:
+                connection.close()
+
+
+def text_notes(chunks, delimiter="\t"):
+    """Yield ``(fields, media)`` for an Anki plain-text (CSV/TSV) export.
+
+    Honours the ``#separator:`` header and drops the columns named by
+    ``#... column:`` headers (note type, deck, tags, GUID).
+    """
+    lines = decode_lines(chunks)
+    skipped = set()
+    first = None
+    for line in lines:
+        if not line.startswith("#"):
+            first = line
+            break
+        key, _, value = line[1:].strip().partition(":")
+        if key == "separator":
+            delimiter = SEPARATORS.get(value.lower(), value[:1] or delimiter)
+        elif key.endswith(" column") and value.isdigit():
+            skipped.add(int(value) - 1)
+    if first is None:
+        return
+    # Plain-text exports carry no media files.
+    media = MediaUploads(None)
+    for record in csv.reader(itertools.chain([first], lines), delimiter=delimiter):
+        if any(record):
+            yield [
+                value for column, value in enumerate(record) if column not in skipped
+            ], media
+
+
+def anki_rows(file, filename, user, card_type="standard", language="en", url_for=None):
+    """Importer rows (see ``CardImporter``) for an Anki package or text export.
+
+    ``card_type`` is one of ``ANKI_CARD_TYPES``. Raises ``AnkiImportError``
+    on the first iteration when the file cannot be read at all.
+    """
+    name = (filename or "").lower()
+    if name.endswith(ARCHIVE_SUFFIXES):
+        notes = apkg_notes(file, user, url_for)
+    else:
+        notes = text_notes(file, "," if name.endswith(".csv") else "\t")
+    for index, (fields, media) in enumerate(notes):
+        try:
+            yield index, note_payload(fields, card_type, language, media)
+        except ValueError as exc:
+            yield index, exc
@@ -0,0 +1,219 @@
+import logging
+from contextvars import ContextVar
+
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Card, CardAuditLog
+
+logger = logging.getLogger(__name__)
+
+# Snapshot fields diffed one level down instead of stored whole.
+NESTED_FIELDS = ("config",)
+_MISSING = object()
+# Entries without a card row at flush time (it is gone after commit).
+CARDLESS_ACTIONS = (CardAuditLog.Action.DELETE, CardAuditLog.Action.BULK_DELETE)
+
+
+def card_snapshot(card: Card):
+    return {
+        "id": card.id,
+        "box_id": card.box_id,
+        "finished": card.finished,
+        "level": card.level,
+        "group_id": card.group_id,
+        "next_review_time": card.next_review_time.isoformat()
+        if card.next_review_time
+        else None,
+        "is_important": card.is_important,
+        "config": card.config,
+    }
+
+
+def diff_snapshots(before, after, nested=NESTED_FIELDS):
+    """Compact ``{"old": {...}, "new": {...}}`` diff of two snapshots.
+
+    Only keys whose value changed are kept; a key missing from ``new`` was
+    removed and one missing from ``old`` was added. Fields in ``nested`` are
+    diffed the same way one level down, so editing one config value does
+    not store the whole config twice.
+    """
+    old, new = {}, {}
+    for key in before.keys() | after.keys():
+        previous = before.get(key, _MISSING)
+        current = after.get(key, _MISSING)
+        if previous == current:
+            continue
+        if key in nested and isinstance(previous, dict) and isinstance(current, dict):
+            inner = diff_snapshots(previous, current, nested=())
+            old[key] = inner["old"]
+            new[key] = inner["new"]
+            continue
+        if previous is not _MISSING:
+            old[key] = previous
+        if current is not _MISSING:
+            new[key] = current
+    return {"old": old, "new": new}
+
+
+def _apply(state, old, new, nested=NESTED_FIELDS):
+    state = dict(state)
+    for key in old.keys() | new.keys():
+        # Nested diffs always hold a dict on both sides; anything else
+        # replaces, adds or removes the whole value.
+        if (
+            key in nested
+            and isinstance(old.get(key), dict)
+            and isinstance(new.get(key), dict)
+            and isinstance(state.get(key), dict)
+        ):
+            state[key] = _apply(state[key], old[key], new[key], ())
+        elif key in new:
+            state[key] = new[key]
+        else:
+            state.pop(key, None)
+    return state
+
+
+def apply_changes(state, changes):
+    """State after an entry, given the state before it."""
+    return _apply(state, changes.get("old", {}), changes.get("new", {}))
+
+
+def revert_changes(state, changes):
+    """State before an entry, given the state after it."""
+    return _apply(state, changes.get("new", {}), changes.get("old", {}))
+
+
+def audit_entry(user, card, action, before=None, after=None, metadata=None):
+    return CardAuditLog(
+        user=user,
+        card=None if action in CARDLESS_ACTIONS else card,
+        action=action,
+        changes=diff_snapshots(before or {}, after or {}),
+        metadata=metadata or {},
+    )
+
+
+class _AuditBuffer:
+    def __init__(self):
+        self.committed = []
+
+    def add(self, entries):
+        # Entries only become writable once their transaction commits; the
+        # callback is dropped, and the entries with it, on rollback.
+        transaction.on_commit(lambda: self.committed.extend(entries))
+
+    def flush(self):
+        entries, self.committed = self.committed, []
+        if entries:
+            CardAuditLog.objects.bulk_create(entries)
+        return len(entries)
+
+
+_buffer: ContextVar = ContextVar("card_audit_buffer", default=None)
+
+
+def record_audit(entries):
+    """Queue audit entries for the current request.
+
+    Inside a request (see ``AuditBufferMiddleware``) entries of committed
+    transactions are written with a single ``bulk_create`` once the view
+    returns; entries of rolled back transactions are dropped. Outside a
+    request they are written immediately.
+
+    Entries are timestamped here, inside the transaction that holds the
+    card's row lock, so ``created_at`` follows the commit order of changes
+    to one card however late the buffer is flushed.
+    """
+    entries = list(entries)
+    if not entries:
+        return
+    now = timezone.now()
+    for entry in entries:
+        entry.created_at = now
+    buffer = _buffer.get()
+    if buffer is None:
+        CardAuditLog.objects.bulk_create(entries)
+        return
+    buffer.add(entries)
+
+
+class AuditBufferMiddleware:
+    """Write-behind audit logging: one audit insert per request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        buffer = _AuditBuffer()
+        token = _buffer.set(buffer)
+        try:
+            return self.get_response(request)
+        finally:
+            _buffer.reset(token)
+            try:
+                buffer.flush()
+            except DatabaseError:
+                # The audited changes are already committed; do not fail the
+                # response because the trail could not be written.
+                logger.exception("Failed to write card audit entries")
+
+
+def _entry_states(log, after_state):
+    """``(before, after)`` states around ``log``, walking backwards."""
+    if log.before_data is not None or log.after_data is not None:
+        # Rows written before diffs were introduced hold full snapshots.
+        return log.before_data or {}, log.after_data or {}
+    return revert_changes(after_state, log.changes), after_state
+
+
+def card_history(card: Card, limit=50, at=None):
+    """Reconstruct the card's states from its audit trail, newest first.
+
+    Starts from the current row and reverts each entry's diff in turn, so
+    every write to a snapshot field needs an entry (rescheduling after a
+    scheduler change included). Returns ``(log, state_after_log)`` pairs,
+    or with ``at`` only the state the card had at that moment
+    (``None`` if it did not exist yet).
+    """
+    logs = CardAuditLog.objects.filter(card=card).order_by("-created_at", "-id")
+    state = card_snapshot(card)
+    if at is not None:
+        for log in logs.filter(created_at__gt=at).iterator():
+            state, _ = _entry_states(log, state)
+        return state or None
+
+    history = []
+    for log in logs[:limit]:
+        before, after = _entry_states(log, state)
+        history.append((log, after))
+        state = before
+    return history
+
+
+def compact_legacy_entries(batch_size=1000):
+    """Rewrite full-snapshot entries as diffs, one batch per transaction.
+
+    Returns the number of entries rewritten.
+    """
+    compacted = 0
+    last_id = 0
+    legacy = CardAuditLog.objects.filter(
+        Q(before_data__isnull=False) | Q(after_data__isnull=False)
+    ).order_by("id")
+    while True:
+        logs = list(legacy.filter(id__gt=last_id)[:batch_size])
+        if not logs:
+            return compacted
+        for log in logs:
+            log.changes = diff_snapshots(log.before_data or {}, log.after_data or {})
+            log.before_data = None
+            log.after_data = None
+        with transaction.atomic():
+            CardAuditLog.objects.bulk_update(
+                logs, ["changes", "before_data", "after_data"]
+            )
+        compacted += len(logs)
+        last_id = logs[-1].id
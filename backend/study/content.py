@@ -0,0 +1,99 @@
+from django.db import connection
+from django.utils import timezone
+
+from .models import Card, CardContent, content_hash
+
+SHARE_BATCH_SIZE = 1000
+# Columns a clone takes from its source card; everything else gets the
+# field default or a value from ``clone_box_cards``.
+CLONED_FIELDS = (
+    "group_id",
+    "content",
+    "own_config",
+    "card_type",
+    "display_text",
+    "search_vector",
+)
+
+
+def share_box_content(box):
+    """Move the configs of ``box``'s cards into shared ``CardContent`` rows.
+
+    Identical configs end up in a single row. This rewrites the cards of
+    ``box`` itself, which may belong to another user than the one cloning
+    it: their ``own_config`` is emptied and ``content`` set. ``Card.config``
+    reads the same afterwards, and the owner's next edit gives a card its own
+    copy again. Must run inside a transaction; the converted cards stay
+    locked until it ends so a concurrent edit cannot be overwritten.
+    """
+    cards = (
+        Card.objects.select_for_update()
+        .filter(box=box, content__isnull=True)
+        .order_by("id")
+        .only("id", "own_config")
+    )
+    last_id = 0
+    while True:
+        batch = list(cards.filter(id__gt=last_id)[:SHARE_BATCH_SIZE])
+        if not batch:
+            return
+        hashes = [content_hash(card.own_config) for card in batch]
+        configs = dict(zip(hashes, (card.own_config for card in batch)))
+        CardContent.objects.bulk_create(
+            [CardContent(hash=key, config=config) for key, config in configs.items()],
+            ignore_conflicts=True,
+        )
+        ids = dict(
+            CardContent.objects.filter(hash__in=configs).values_list("hash", "id")
+        )
+        for card, key in zip(batch, hashes):
+            card.content_id = ids[key]
+            card.own_config = {}
+        Card.objects.bulk_update(batch, ["content", "own_config"])
+        last_id = batch[-1].id
+
+
+def clone_box_cards(source, box, user):
+    """Copy the cards of ``source`` into ``box`` as fresh, unscheduled cards.
+
+    The copies share their source's content, so this is one
+    ``INSERT ... SELECT`` of scheduling rows. The source cards are converted
+    to shared content first (see ``share_box_content``); ``own_config`` is
+    copied too, so a card added or edited since then keeps its config.
+    Returns the number of cards cloned.
+    """
+    share_box_content(source)
+    now = timezone.now()
+    values = {
+        "user": user.id,
+        "box": box.id,
+        "created_at": now,
+        "updated_at": now,
+    }
+    columns, selected, params = [], [], []
+    for field in Card._meta.concrete_fields:
+        if field.primary_key:
+            continue
+        columns.append(connection.ops.quote_name(field.column))
+        if field.name in CLONED_FIELDS:
+            selected.append(connection.ops.quote_name(field.column))
+            continue
+        value = values[field.name] if field.name in values else field.get_default()
+        selected.append("%s")
+        params.append(field.get_db_prep_save(value, connection))
+
+    table = connection.ops.quote_name(Card._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"SELECT {', '.join(selected)} FROM {table} "
+            "WHERE box_id = %s ORDER BY created_at, id",
+            [*params, source.id],
+        )
+        return cursor.rowcount
+
+
+def purge_unused_content():
+    """Delete shared content no card points at any more."""
+    deleted, _ = CardContent.objects.filter(cards__isnull=True).delete()
+    return deleted
@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+
+from .audit import audit_entry, card_snapshot
+from .models import AiJob, Box, Card, CardAuditLog
+from .rollups import discard_box_activity
+from .stats import card_state, record_card_changes
+
+# Cards deleted (and audit rows written) per transaction.
+DELETE_BATCH_SIZE = 1000
+
+SNAPSHOT_FIELDS = (
+    "id",
+    "box",
+    "finished",
+    "level",
+    "group_id",
+    "next_review_time",
+    "is_important",
+    "own_config",
+    "content",
+)
+
+
+def delete_box_cards(
+    box: Box, user, source="delete_cards", batch_size=None, progress=None
+):
+    """Delete every card of ``box`` in bounded batches.
+
+    Each batch loads only the snapshot fields of up to ``batch_size`` cards,
+    writes their audit rows with one insert and deletes them (with their
+    activity and review logs) in its own transaction, so memory use and lock
+    time stay flat however large the box is. ``progress(deleted, total)`` is
+    called after every batch. Safe to re-run after an interruption. Returns
+    the number of cards deleted.
+    """
+    batch_size = batch_size or DELETE_BATCH_SIZE
+    cards = Card.objects.filter(box=box, user=user)
+    total = cards.count()
+    discard_box_activity(box.id)
+
+    deleted = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                cards.filter(id__gt=last_id)
+                .order_by("id")
+                .only(*SNAPSHOT_FIELDS)[:batch_size]
+            )
+            if not batch:
+                break
+            prefetch_related_objects(batch, "content")
+            # Written directly rather than through ``record_audit``: holding
+            # the entries of a large box until the request ends is what this
+            # path avoids.
+            CardAuditLog.objects.bulk_create(
+                [
+                    audit_entry(
+                        user=user,
+                        card=card,
+                        action=CardAuditLog.Action.BULK_DELETE,
+                        before=card_snapshot(card),
+                        after=None,
+                        metadata={"source": source},
+                    )
+                    for card in batch
+                ]
+            )
+            Card.objects.filter(id__in=[card.id for card in batch]).delete()
+            record_card_changes(box.id, removed=[card_state(card) for card in batch])
+        deleted += len(batch)
+        last_id = batch[-1].id
+        if progress is not None:
+            progress(deleted, total)
+    return deleted
+
+
+def delete_box(box: Box, user, batch_size=None, progress=None):
+    """Delete ``box`` after emptying it through ``delete_box_cards``."""
+    deleted = delete_box_cards(
+        box, user, source="delete_box", batch_size=batch_size, progress=progress
+    )
+    box.delete()
+    return deleted
+
+
+def job_progress(job: AiJob):
+    """Progress callback that stores ``{"deleted", "total"}`` on ``job``."""
+
+    def report(deleted, total):
+        # Refreshing ``started_at`` renews the worker lease, so a long
+        # deletion is not handed to a second worker halfway through.
+        AiJob.objects.filter(id=job.id).update(
+            result={"deleted": deleted, "total": total},
+            started_at=timezone.now(),
+        )
+
+    return report
@@ -0,0 +1,144 @@
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import AiReviewLog, Box, Card, CardActivity, Exercise, ExerciseHistory
+
+# Rows fetched per round trip from each server-side cursor.
+EXPORT_CHUNK_SIZE = 2000
+# Encoded output is handed to the response in pieces of about this size.
+EXPORT_FLUSH_SIZE = 64 * 1024
+
+BOX_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "scheduler",
+    "created_at",
+    "updated_at",
+)
+CARD_FIELDS = (
+    "id",
+    "box_id",
+    "group_id",
+    "card_type",
+    "finished",
+    "level",
+    "next_review_time",
+    "ease",
+    "interval_hours",
+    "is_important",
+    "correct_count",
+    "incorrect_count",
+    "last_answered_at",
+    "created_at",
+    "updated_at",
+)
+ACTIVITY_FIELDS = ("id", "card_id", "action", "card_level", "created_at")
+AI_REVIEW_FIELDS = ("id", "card_id", "card_level", "answer", "review", "created_at")
+EXERCISE_FIELDS = (
+    "id",
+    "title",
+    "question_making_prompt",
+    "evaluate_prompt",
+    "exercises",
+    "created_at",
+    "updated_at",
+)
+EXERCISE_HISTORY_FIELDS = (
+    "id",
+    "exercise_id",
+    "question",
+    "answer",
+    "review",
+    "score",
+    "created_at",
+)
+
+
+def _rows(kind, queryset, fields):
+    for row in queryset.values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {"type": kind, **row}
+
+
+def _cards(queryset):
+    fields = (*CARD_FIELDS, "own_config", "content__config")
+    for row in queryset.values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        own_config = row.pop("own_config")
+        shared_config = row.pop("content__config")
+        row["config"] = own_config if shared_config is None else shared_config
+        yield {"type": "card", **row}
+
+
+def box_records(box: Box):
+    """Export records of one box: the box, its cards and their history."""
+    yield {"type": "box", **{name: getattr(box, name) for name in BOX_FIELDS}}
+    yield from _cards(Card.objects.filter(box=box).order_by("created_at", "id"))
+    yield from _rows(
+        "activity",
+        CardActivity.objects.filter(card__box=box).order_by("created_at", "id"),
+        ACTIVITY_FIELDS,
+    )
+    yield from _rows(
+        "ai_review",
+        AiReviewLog.objects.filter(card__box=box).order_by("created_at", "id"),
+        AI_REVIEW_FIELDS,
+    )
+
+
+def user_records(user):
+    """Export records of everything ``user`` owns, one kind after another."""
+    yield from _rows(
+        "box", Box.objects.filter(user=user).order_by("created_at", "id"), BOX_FIELDS
+    )
+    yield from _cards(Card.objects.filter(user=user).order_by("created_at", "id"))
+    yield from _rows(
+        "activity",
+        CardActivity.objects.filter(user=user).order_by("created_at", "id"),
+        ACTIVITY_FIELDS,
+    )
+    yield from _rows(
+        "ai_review",
+        AiReviewLog.objects.filter(user=user).order_by("created_at", "id"),
+        AI_REVIEW_FIELDS,
+    )
+    yield from _rows(
+        "exercise",
+        Exercise.objects.filter(user=user).order_by("created_at", "id"),
+        EXERCISE_FIELDS,
+    )
+    yield from _rows(
+        "exercise_history",
+        ExerciseHistory.objects.filter(user=user).order_by("created_at", "id"),
+        EXERCISE_HISTORY_FIELDS,
+    )
+
+
+def stream_ndjson(records, compress=False):
+    """Encode ``records`` as NDJSON, gzipped when ``compress``.
+
+    Yields byte strings of about ``EXPORT_FLUSH_SIZE`` so memory use does not
+    depend on the size of the export.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    # wbits=31 writes a gzip header and trailer around the deflate stream.
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer, size = [], 0
+    for record in records:
+        line = (encoder.encode(record) + "\n").encode()
+        buffer.append(line)
+        size += len(line)
+        if size < EXPORT_FLUSH_SIZE:
+            continue
+        data = b"".join(buffer)
+        buffer, size = [], 0
+        if compressor is not None:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    data = b"".join(buffer)
+    if compressor is not None:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
+
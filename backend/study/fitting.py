@@ -0,0 +1,226 @@
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.db import connections
+
+from .models import Box, CardActivity, SchedulerParameters
+from .scheduler import MAX_ACTIVE_LEVEL, LeitnerScheduler, SM2Scheduler
+
+DEFAULT_CHUNK_SIZE = 20000
+DEFAULT_MIN_SAMPLES = 30
+DEFAULT_TARGET_RETENTION = 0.9
+# Candidate memory stabilities, from one hour to four years.
+STABILITY_GRID_HOURS = np.geomspace(1.0, 24.0 * 365 * 4, 96)
+
+ANSWER_ACTIONS = (
+    CardActivity.Action.ANSWER_CORRECT,
+    CardActivity.Action.ANSWER_INCORRECT,
+)
+
+
+class _RetentionAccumulator:
+    """Streams answer rows and accumulates per-level log-likelihoods.
+
+    Recall after ``t`` hours is modelled as ``exp(-t / S)``. For every level
+    the log-likelihood of each candidate stability ``S`` in
+    ``STABILITY_GRID_HOURS`` is summed chunk by chunk, so memory stays
+    proportional to the chunk size rather than to the history length.
+    """
+
+    def __init__(self):
+        levels = MAX_ACTIVE_LEVEL + 1
+        self.log_likelihood = np.zeros((levels, len(STABILITY_GRID_HOURS)))
+        self.samples = np.zeros(levels, dtype=np.int64)
+        self.correct = np.zeros(levels, dtype=np.int64)
+        self.rows = 0
+        self._last_card = -1
+        self._last_time = 0.0
+
+    def add_chunk(self, rows):
+        card_ids, actions, levels, created = zip(*rows)
+        card_ids = np.asarray(card_ids, dtype=np.int64)
+        levels = np.asarray(levels, dtype=np.int64)
+        times = np.asarray([value.timestamp() for value in created])
+        actions = np.asarray(actions)
+        is_correct = actions == CardActivity.Action.ANSWER_CORRECT
+        is_answer = is_correct | (actions == CardActivity.Action.ANSWER_INCORRECT)
+
+        previous_card = np.concatenate(([self._last_card], card_ids[:-1]))
+        previous_time = np.concatenate(([self._last_time], times[:-1]))
+        self._last_card = card_ids[-1]
+        self._last_time = times[-1]
+        self.rows += len(card_ids)
+
+        elapsed_hours = (times - previous_time) / 3600.0
+        valid = (
+            is_answer
+            & (previous_card == card_ids)
+            & (levels >= 1)
+            & (levels <= MAX_ACTIVE_LEVEL)
+            & (elapsed_hours > 0)
+        )
+        if not valid.any():
+            return
+
+        levels = levels[valid]
+        outcome = is_correct[valid]
+        elapsed_hours = np.maximum(elapsed_hours[valid], 1.0 / 60)
+        recall = np.exp(-elapsed_hours[:, None] / STABILITY_GRID_HOURS[None, :])
+        recall = np.clip(recall, 1e-6, 1 - 1e-6)
+        log_likelihood = np.where(
+            outcome[:, None], np.log(recall), np.log1p(-recall)
+        )
+
+        for level in np.unique(levels):
+            mask = levels == level
+            self.log_likelihood[level] += log_likelihood[mask].sum(axis=0)
+        np.add.at(self.samples, levels, 1)
+        np.add.at(self.correct, levels, outcome.astype(np.int64))
+
+    def stability_hours(self, min_samples):
+        best = STABILITY_GRID_HOURS[np.argmax(self.log_likelihood, axis=1)]
+        return {
+            int(level): float(best[level])
+            for level in range(1, MAX_ACTIVE_LEVEL + 1)
+            if self.samples[level] >= min_samples
+        }
+
+
+def _stream_activity(user_id, chunk_size):
+    rows = (
+        CardActivity.objects.filter(user_id=user_id)
+        .exclude(action=CardActivity.Action.CREATE)
+        .order_by("card_id", "created_at", "id")
+        .values_list("card_id", "action", "card_level", "created_at")
+        .iterator(chunk_size=chunk_size)
+    )
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _derive_params(stability, target_retention):
+    """Turn fitted stabilities into Leitner and SM-2 parameters."""
+    if not stability:
+        return {}
+    defaults = LeitnerScheduler.default_schedule_hours
+    hours = [
+        -stability[level] * math.log(target_retention)
+        if level in stability
+        else float(defaults[level])
+        for level in range(2, MAX_ACTIVE_LEVEL + 1)
+    ]
+    # Intervals must never shrink as a card climbs levels, so unfitted levels
+    # are stored too in case they were raised above their default.
+    hours = np.maximum.accumulate(hours)
+    schedule_hours = {
+        str(level): round(float(value), 2)
+        for level, value in zip(range(2, MAX_ACTIVE_LEVEL + 1), hours)
+    }
+    params = {Box.Scheduler.LEITNER: {"schedule_hours": schedule_hours}}
+
+    sm2_params = {}
+    first_interval = SM2Scheduler.default_params["first_interval_hours"]
+    if 2 in stability:
+        first_interval = schedule_hours["2"]
+        sm2_params["first_interval_hours"] = first_interval
+    if 3 in stability:
+        sm2_params["second_interval_hours"] = max(schedule_hours["3"], first_interval)
+    if sm2_params:
+        params[Box.Scheduler.SM2] = sm2_params
+    return params
+
+
+def fit_user_parameters(
+    user_id,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    min_samples=DEFAULT_MIN_SAMPLES,
+    target_retention=DEFAULT_TARGET_RETENTION,
+    save=True,
+):
+    """Fit retention and interval parameters from a user's answer history.
+
+    Activity rows are streamed in ``chunk_size`` batches ordered by card, so
+    the elapsed time before every answer can be derived without loading the
+    full history. Levels with fewer than ``min_samples`` answers keep the
+    scheduler defaults. Returns the (saved unless ``save`` is false)
+    ``SchedulerParameters`` instance.
+    """
+    accumulator = _RetentionAccumulator()
+    for chunk in _stream_activity(user_id, chunk_size):
+        accumulator.add_chunk(chunk)
+
+    stability = accumulator.stability_hours(min_samples)
+    parameters = SchedulerParameters(
+        user_id=user_id,
+        params=_derive_params(stability, target_retention),
+        stability_hours={
+            str(level): {
+                "stability": round(value, 2),
+                "samples": int(accumulator.samples[level]),
+                "pass_rate": round(
+                    float(accumulator.correct[level] / accumulator.samples[level]), 4
+                ),
+            }
+            for level, value in stability.items()
+        },
+        sample_count=int(accumulator.samples.sum()),
+    )
+    if save:
+        parameters.save()
+    return parameters
+
+
+def _fit_user_summary(user_id, options):
+    parameters = fit_user_parameters(user_id, **options)
+    return {
+        "user_id": user_id,
+        "samples": parameters.sample_count,
+        "levels": sorted(int(level) for level in parameters.stability_hours),
+    }
+
+
+def _fit_user_worker(user_id, options):
+    try:
+        return _fit_user_summary(user_id, options)
+    finally:
+        connections.close_all()
+
+
+def fit_users(user_ids, workers=1, **options):
+    """Fit parameters for many users, fanning out over a process pool.
+
+    With ``workers`` > 1 every user is fitted in a forked worker process with
+    its own database connection. Yields one summary dict per user.
+    """
+    user_ids = list(user_ids)
+    if workers <= 1 or len(user_ids) <= 1:
+        for user_id in user_ids:
+            yield _fit_user_summary(user_id, options)
+        return
+
+    # Forked children must not share the parent's open connections.
+    connections.close_all()
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = [
+            executor.submit(_fit_user_worker, user_id, options) for user_id in user_ids
+        ]
+        for future in futures:
+            yield future.result()
+
+
+def users_with_answers():
+    return (
+        CardActivity.objects.filter(action__in=ANSWER_ACTIONS)
+        .order_by()
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
@@ -0,0 +1,78 @@
+import numpy as np
+from django.db.models import Count, Q
+
+from .models import Card, CardActivity
+from .scheduler import FINISHED_LEVEL, MAX_ACTIVE_LEVEL, ScheduleBatch
+
+DEFAULT_PASS_RATE = 0.8
+# Weight of the default pass rate when a level has little history.
+PASS_RATE_PRIOR = 10
+
+
+def pass_rates(activities) -> np.ndarray:
+    """Smoothed pass rate per card level from answer activity rows."""
+    rows = (
+        activities.filter(
+            action__in=[
+                CardActivity.Action.ANSWER_CORRECT,
+                CardActivity.Action.ANSWER_INCORRECT,
+            ]
+        )
+        .order_by()
+        .values("card_level")
+        .annotate(
+            total=Count("id"),
+            correct=Count("id", filter=Q(action=CardActivity.Action.ANSWER_CORRECT)),
+        )
+    )
+    correct = np.zeros(FINISHED_LEVEL + 1)
+    total = np.zeros(FINISHED_LEVEL + 1)
+    for row in rows:
+        level = min(row["card_level"], FINISHED_LEVEL)
+        correct[level] += row["correct"]
+        total[level] += row["total"]
+    return (correct + PASS_RATE_PRIOR * DEFAULT_PASS_RATE) / (total + PASS_RATE_PRIOR)
+
+
+def level_intervals(scheduler) -> np.ndarray:
+    """Hours a card waits after reaching each level under ``scheduler``."""
+    levels = np.arange(FINISHED_LEVEL + 1)
+    batch = ScheduleBatch.from_values(
+        levels,
+        np.zeros(len(levels), dtype=bool),
+        np.full(len(levels), Card._meta.get_field("ease").default),
+        np.zeros(len(levels)),
+    )
+    return np.nan_to_num(scheduler.reschedule_many(batch).interval_hours, nan=0.0)
+
+
+def simulate_reviews(initial_due, intervals, rates) -> np.ndarray:
+    """Project expected reviews per hourly step.
+
+    ``initial_due`` is a ``(steps, levels)`` matrix of cards already
+    scheduled for each step. Every review passes with the level's rate and
+    is rescheduled ``intervals[level + 1]`` hours later, or fails and comes
+    back at level 1 in the next step. Returns expected reviews per step.
+    """
+    due = np.array(initial_due, dtype=np.float64)
+    steps = due.shape[0]
+    levels = np.arange(1, MAX_ACTIVE_LEVEL + 1)
+    pass_offsets = np.maximum(
+        np.rint(intervals[np.minimum(levels + 1, MAX_ACTIVE_LEVEL)]), 1
+    ).astype(np.int64)
+    promotes = levels + 1 <= MAX_ACTIVE_LEVEL
+    fail_offset = max(int(np.rint(intervals[1])), 1)
+
+    projected = np.zeros(steps)
+    for step in range(steps):
+        reviews = due[step, levels]
+        projected[step] = reviews.sum()
+        if not projected[step]:
+            continue
+        passed = reviews * rates[levels]
+        targets = step + pass_offsets
+        keep = promotes & (targets < steps)
+        np.add.at(due, (targets[keep], levels[keep] + 1), passed[keep])
+        if step + fail_offset < steps:
+            due[step + fail_offset, 1] += (reviews - passed).sum()
+    return projected
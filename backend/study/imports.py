@@ -0,0 +1,296 @@
+import codecs
+import csv
+import json
+import logging
+import re
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models.sql import Query
+from django.utils import timezone
+
+from .audit import audit_entry, card_snapshot
+from .models import Card, CardActivity, CardAuditLog
+from .rollups import record_activity
+from .stats import card_state, record_card_changes
+
+logger = logging.getLogger(__name__)
+
+# Rows loaded (cards, activities and audit entries) per transaction.
+IMPORT_CHUNK_SIZE = 2000
+# Errors listed in the response; the rest are only counted.
+MAX_REPORTED_ERRORS = 1000
+# Filled by the database after each chunk is copied.
+COPY_EXCLUDED_FIELDS = ("search_vector",)
+# Cards per search vector ``UPDATE``, well inside the bind parameter limit.
+SEARCH_VECTOR_BATCH_SIZE = 500
+# Bytes that are not UTF-8 decode to lone surrogates (see ``decode_lines``).
+_SURROGATE = re.compile("[\ud800-\udfff]")
+
+
+def check_text(value):
+    """Raise ``ValueError`` if ``value`` holds text Postgres cannot store.
+
+    Walks dicts and lists; catches NUL characters and undecodable bytes,
+    which would otherwise fail a whole ``COPY`` chunk.
+    """
+    if isinstance(value, str):
+        if "\x00" in value:
+            raise ValueError("Text must not contain NUL characters.")
+        if _SURROGATE.search(value):
+            raise ValueError("Text is not valid UTF-8.")
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            check_text(key)
+            check_text(item)
+    elif isinstance(value, list):
+        for item in value:
+            check_text(item)
+
+
+def card_from_payload(payload, default_group=""):
+    """``(config, group_id)`` of one card in the bulk-create payload format.
+
+    A payload is either ``{"config": {...}, "group_id": ...}`` or the config
+    itself with an optional ``group_id`` key. Raises ``ValueError`` with the
+    message to report when the payload is invalid.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Card must be an object.")
+    config = payload.get("config")
+    if config is None:
+        config = dict(payload)
+        group_id = config.pop("group_id", "")
+    else:
+        group_id = payload.get("group_id", "")
+    if not isinstance(config, dict):
+        raise ValueError("Config must be an object.")
+    if not config.get("type"):
+        raise ValueError("Card type is required.")
+    check_text(config)
+    group_id = group_id or default_group or ""
+    check_text(group_id)
+    return config, group_id
+
+
+def decode_lines(chunks):
+    """Decode UTF-8 ``chunks`` as they arrive.
+
+    Invalid bytes never raise: they become lone surrogates, which
+    ``check_text`` reports on the row holding them.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="surrogateescape")
+    for chunk in chunks:
+        yield decoder.decode(chunk)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def ndjson_rows(lines):
+    """Yield ``(index, payload)`` per non-blank line; bad JSON yields the error."""
+    index = 0
+    for line in decode_lines(lines):
+        if not line.strip():
+            continue
+        try:
+            yield index, json.loads(line)
+        except ValueError:
+            yield index, ValueError("Invalid JSON.")
+        index += 1
+
+
+def csv_rows(lines):
+    """Yield ``(index, payload)`` per CSV record after the header.
+
+    Empty cells are left out. A ``config`` column holds a JSON object that
+    the other columns are merged into; every other column is a config key.
+    """
+    for index, record in enumerate(csv.DictReader(decode_lines(lines))):
+        payload = {key: value for key, value in record.items() if key and value}
+        raw_config = payload.pop("config", None)
+        if raw_config is not None:
+            try:
+                config = json.loads(raw_config)
+            except ValueError:
+                yield index, ValueError("Config must be valid JSON.")
+                continue
+            if not isinstance(config, dict):
+                yield index, ValueError("Config must be an object.")
+                continue
+            group_id = payload.pop("group_id", "")
+            payload = {"config": {**config, **payload}, "group_id": group_id}
+        yield index, payload
+
+
+def _copy(cursor, model, objs, exclude=()):
+    """Load ``objs`` with ``COPY``, preparing values like an ``INSERT``.
+
+    The primary key is only sent when it is set.
+    """
+    fields = [
+        field
+        for field in model._meta.concrete_fields
+        if field.name not in exclude
+        and not (field.primary_key and objs[0].pk is None)
+    ]
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    table = connection.ops.quote_name(model._meta.db_table)
+    with cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+        for obj in objs:
+            copy.write_row(
+                [
+                    field.get_db_prep_save(field.pre_save(obj, True), connection)
+                    for field in fields
+                ]
+            )
+
+
+def _update_search_vectors(cursor, cards):
+    """Write the ``search_vector`` expressions of copied ``cards``.
+
+    Each card's ``card_search_vector`` expression is joined in as a
+    ``VALUES`` row of one ``UPDATE`` per batch, so imported cards get the
+    same vectors as cards saved through the ORM.
+    """
+    query = Query(Card)
+    compiler = query.get_compiler(connection=connection)
+    table = connection.ops.quote_name(Card._meta.db_table)
+    for start in range(0, len(cards), SEARCH_VECTOR_BATCH_SIZE):
+        rows, params = [], []
+        for card in cards[start : start + SEARCH_VECTOR_BATCH_SIZE]:
+            sql, vector_params = compiler.compile(
+                card.search_vector.resolve_expression(query)
+            )
+            rows.append(f"(%s::bigint, {sql})")
+            params.extend([card.id, *vector_params])
+        cursor.execute(
+            f"UPDATE {table} SET search_vector = vectors.vector "
+            f"FROM (VALUES {', '.join(rows)}) AS vectors (id, vector) "
+            f"WHERE {table}.id = vectors.id",
+            params,
+        )
+
+
+class CardImporter:
+    """Stream cards into ``box`` in chunks loaded with ``COPY``.
+
+    Rows are validated as they arrive; invalid ones are reported and
+    skipped. Every chunk is committed on its own with its activity rows,
+    audit entries and box counters, so memory use stays flat and a long
+    import does not hold one huge transaction open.
+    """
+
+    def __init__(self, user, box, group_id="", prepare_config=None, chunk_size=None):
+        self.user = user
+        self.box = box
+        self.group_id = group_id
+        self.prepare_config = prepare_config
+        self.chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+        self.now = timezone.now()
+        self.created = 0
+        self.errors = []
+        self.error_count = 0
+        active_groups = set(
+            Card.objects.filter(box=box, user=user, finished=False)
+            .exclude(level=0)
+            .values_list("group_id", flat=True)
+        )
+        active_groups.discard("")
+        self.active_groups = active_groups
+
+    def add_error(self, index, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"index": index, "error": message})
+
+    def run(self, rows):
+        """Import ``(index, payload)`` rows; returns ``self``."""
+        pending = []
+        for index, payload in rows:
+            if isinstance(payload, ValueError):
+                self.add_error(index, str(payload))
+                continue
+            try:
+                config, group_id = card_from_payload(payload, self.group_id)
+                if self.prepare_config is not None:
+                    config = self.prepare_config(config)
+            except ValueError as exc:
+                self.add_error(index, str(exc))
+                continue
+            activate = bool(group_id and group_id in self.active_groups)
+            pending.append(
+                (
+                    index,
+                    Card(
+                        user=self.user,
+                        box=self.box,
+                        finished=False,
+                        level=1 if activate else 0,
+                        group_id=group_id,
+                        next_review_time=self.now if activate else None,
+                        config=config,
+                    ),
+                )
+            )
+            if len(pending) >= self.chunk_size:
+                self._load_chunk(pending)
+                pending = []
+        if pending:
+            self._load_chunk(pending)
+        return self
+
+    def _load_chunk(self, pending):
+        cards = [card for _, card in pending]
+        try:
+            self._load(cards)
+        except DatabaseError:
+            # The chunk was rolled back as a whole; report its rows and go
+            # on with the next one rather than losing what was imported.
+            logger.exception("Card import chunk failed")
+            for index, _ in pending:
+                self.add_error(index, "The card could not be stored.")
+
+    def _load(self, cards):
+        with transaction.atomic(), connection.cursor() as cursor:
+            # COPY cannot return generated keys, so ids are drawn up front.
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                "FROM generate_series(1, %s)",
+                [Card._meta.db_table, len(cards)],
+            )
+            for card, (card_id,) in zip(cards, cursor.fetchall()):
+                card.id = card_id
+                card.sync_config_fields()
+            _copy(cursor, Card, cards, exclude=COPY_EXCLUDED_FIELDS)
+            _update_search_vectors(cursor, cards)
+            for card in cards:
+                card.clear_search_vector()
+
+            activities = [
+                CardActivity(
+                    user=self.user,
+                    card=card,
+                    action=CardActivity.Action.CREATE,
+                    card_level=card.level,
+                )
+                for card in cards
+            ]
+            _copy(cursor, CardActivity, activities)
+            record_activity(activities)
+            _copy(
+                cursor,
+                CardAuditLog,
+                [
+                    audit_entry(
+                        user=self.user,
+                        card=card,
+                        action=CardAuditLog.Action.BULK_CREATE,
+                        before=None,
+                        after=card_snapshot(card),
+                        metadata={"source": "import"},
+                    )
+                    for card in cards
+                ],
+            )
+            record_card_changes(self.box.id, added=[card_state(card) for card in cards])
+        self.created += len(cards)
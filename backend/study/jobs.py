@@ -0,0 +1,328 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .ai import generate_exercises, run_ai_review, run_exercise_evaluation
+from .deletion import delete_box, delete_box_cards, job_progress
+from .models import AiJob, Box, Card, Exercise
+from .rollups import rebuild_activity_rollups
+
+logger = logging.getLogger(__name__)
+
+# A running job whose worker has not finished within the lease is retried.
+JOB_LEASE = timedelta(minutes=5)
+# How often a running job renews its lease, well within ``JOB_LEASE``.
+LEASE_RENEWAL = JOB_LEASE / 3
+MAX_ATTEMPTS = 3
+# Delay before the first retry of a failed job; doubled for every attempt.
+RETRY_BACKOFF = timedelta(seconds=30)
+# Prefetch a new batch once an exercise has this many questions left.
+EXERCISE_LOW_WATERMARK = 3
+
+
+def _run_ai_review(job: AiJob):
+    card = Card.objects.get(id=job.payload["card_id"], user_id=job.user_id)
+    return run_ai_review(
+        job.user, card, job.payload["answer"], card_level=job.payload.get("card_level")
+    )
+
+
+def _run_exercise_evaluate(job: AiJob):
+    exercise = Exercise.objects.get(
+        id=job.payload["exercise_id"], user_id=job.user_id
+    )
+    return run_exercise_evaluation(
+        job.user, exercise, job.payload["question"], job.payload["answer"]
+    )
+
+
+def _run_generate_exercises(job: AiJob):
+    exercise = Exercise.objects.get(
+        id=job.payload["exercise_id"], user_id=job.user_id
+    )
+    if exercise.question_making_prompt != job.payload["prompt"]:
+        # A newer job was queued for the updated prompt.
+        return {"skipped": True}
+    generated = generate_exercises(exercise)
+
+    with transaction.atomic():
+        exercise = Exercise.objects.select_for_update().get(id=exercise.id)
+        if exercise.question_making_prompt != job.payload["prompt"]:
+            return {"skipped": True}
+        if job.payload.get("mode") == "append":
+            existing = list(exercise.exercises or [])
+            seen = set(existing)
+            exercise.exercises = existing + [
+                item for item in generated if item not in seen
+            ]
+        else:
+            exercise.exercises = generated
+        exercise.generation_status = Exercise.GenerationStatus.READY
+        exercise.generation_error = ""
+        exercise.save(
+            update_fields=[
+                "exercises",
+                "generation_status",
+                "generation_error",
+                "updated_at",
+            ]
+        )
+    return {"generated": len(generated)}
+
+
+def _run_delete_box_cards(job: AiJob):
+    box = Box.objects.get(id=job.payload["box_id"], user_id=job.user_id)
+    return {"deleted": delete_box_cards(box, job.user, progress=job_progress(job))}
+
+
+def _run_delete_box(job: AiJob):
+    box = Box.objects.get(id=job.payload["box_id"], user_id=job.user_id)
+    return {"deleted": delete_box(box, job.user, progress=job_progress(job))}
+
+
+def _run_rebuild_rollups(job: AiJob):
+    return {"written": rebuild_activity_rollups(user_ids=[job.user_id])}
+
+
+def _fail_generate_exercises(job: AiJob):
+    Exercise.objects.filter(
+        id=job.payload["exercise_id"],
+        question_making_prompt=job.payload["prompt"],
+    ).update(
+        generation_status=Exercise.GenerationStatus.FAILED,
+        generation_error=job.error,
+    )
+
+
+JOB_HANDLERS = {
+    AiJob.Kind.AI_REVIEW: _run_ai_review,
+    AiJob.Kind.EXERCISE_EVALUATE: _run_exercise_evaluate,
+    AiJob.Kind.GENERATE_EXERCISES: _run_generate_exercises,
+    AiJob.Kind.DELETE_BOX_CARDS: _run_delete_box_cards,
+    AiJob.Kind.DELETE_BOX: _run_delete_box,
+    AiJob.Kind.REBUILD_ROLLUPS: _run_rebuild_rollups,
+}
+# Called once a job has failed for good.
+JOB_FAILURE_HANDLERS = {
+    AiJob.Kind.GENERATE_EXERCISES: _fail_generate_exercises,
+}
+
+
+def enqueue_job(user, kind: str, payload: dict) -> AiJob:
+    return AiJob.objects.create(user=user, kind=kind, payload=payload)
+
+
+def request_rollup_rebuild(user):
+    """Queue a rebuild of ``user``'s activity rollups unless one is pending."""
+    pending = AiJob.objects.filter(
+        user=user, kind=AiJob.Kind.REBUILD_ROLLUPS, status=AiJob.Status.PENDING
+    )
+    if pending.exists():
+        return None
+    return enqueue_job(user, AiJob.Kind.REBUILD_ROLLUPS, {})
+
+
+def request_exercise_generation(exercises, replace=False):
+    """Queue background generation for ``exercises``.
+
+    With ``replace`` the generated batch overwrites the current list (new or
+    changed prompts) and a job is always queued. Otherwise the batch is
+    appended, and nothing is queued while generation is already pending.
+    Returns the queued jobs.
+    """
+    exercises = list(exercises)
+    queryset = Exercise.objects.filter(id__in=[exercise.id for exercise in exercises])
+    if not replace:
+        queryset = queryset.exclude(
+            generation_status=Exercise.GenerationStatus.PENDING
+        )
+    with transaction.atomic():
+        # The lock makes a concurrent call re-check the status once this
+        # one commits, so a pending generation is never queued twice.
+        ids = set(queryset.select_for_update().values_list("id", flat=True))
+        Exercise.objects.filter(id__in=ids).update(
+            generation_status=Exercise.GenerationStatus.PENDING,
+            generation_error="",
+        )
+        queued = []
+        for exercise in exercises:
+            if exercise.id not in ids:
+                continue
+            ids.discard(exercise.id)
+            exercise.generation_status = Exercise.GenerationStatus.PENDING
+            exercise.generation_error = ""
+            queued.append(
+                AiJob(
+                    user_id=exercise.user_id,
+                    kind=AiJob.Kind.GENERATE_EXERCISES,
+                    payload={
+                        "exercise_id": exercise.id,
+                        "prompt": exercise.question_making_prompt,
+                        "mode": "replace" if replace else "append",
+                    },
+                )
+            )
+        if queued:
+            AiJob.objects.bulk_create(queued)
+    return queued
+
+
+def claim_jobs(limit: int):
+    """Lock and mark up to ``limit`` runnable jobs as running.
+
+    Uses ``SELECT ... FOR UPDATE SKIP LOCKED`` so concurrent workers never
+    claim the same job. A running job renews its lease (see
+    ``_lease_renewed``); jobs whose lease is older than ``JOB_LEASE`` lost
+    their worker and are reclaimed, unless they already used
+    ``MAX_ATTEMPTS``: those most likely took their worker down and are
+    failed instead. Failed attempts wait for their ``retry_at``.
+    """
+    now = timezone.now()
+    expired = Q(status=AiJob.Status.RUNNING, started_at__lt=now - JOB_LEASE)
+    with transaction.atomic():
+        abandoned = list(
+            AiJob.objects.select_for_update(skip_locked=True).filter(
+                expired, attempts__gte=MAX_ATTEMPTS
+            )
+        )
+        for job in abandoned:
+            _finish_job(job, AiJob.Status.FAILED, error="The worker lease expired.")
+        jobs = list(
+            AiJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=AiJob.Status.PENDING)
+                & (Q(retry_at__isnull=True) | Q(retry_at__lte=now))
+                | expired & Q(attempts__lt=MAX_ATTEMPTS)
+            )
+            .select_related("user")
+            .order_by("created_at")[:limit]
+        )
+        if jobs:
+            AiJob.objects.filter(id__in=[job.id for job in jobs]).update(
+                status=AiJob.Status.RUNNING,
+                started_at=now,
+                attempts=F("attempts") + 1,
+            )
+    for job in abandoned:
+        if job.kind in JOB_FAILURE_HANDLERS:
+            JOB_FAILURE_HANDLERS[job.kind](job)
+    for job in jobs:
+        job.status = AiJob.Status.RUNNING
+        job.started_at = now
+        job.attempts += 1
+    return jobs
+
+
+def _renew_lease(job: AiJob, stopped):
+    try:
+        while not stopped.wait(LEASE_RENEWAL.total_seconds()):
+            try:
+                AiJob.objects.filter(
+                    id=job.id, status=AiJob.Status.RUNNING, attempts=job.attempts
+                ).update(started_at=timezone.now())
+            except DatabaseError:
+                logger.exception("Could not renew the lease of AI job %s", job.id)
+    finally:
+        connection.close()
+
+
+@contextmanager
+def _lease_renewed(job: AiJob):
+    """Keep renewing ``job``'s lease from a timer thread while it runs.
+
+    A single long step, such as the rollup rebuild query, would otherwise
+    outlast ``JOB_LEASE`` and let a second worker claim the job.
+    """
+    stopped = threading.Event()
+    thread = threading.Thread(
+        target=_renew_lease, args=(job, stopped), name=f"ai-job-{job.id}-lease"
+    )
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run_job(job: AiJob):
+    handler = JOB_HANDLERS[job.kind]
+    try:
+        with _lease_renewed(job):
+            result = handler(job)
+    except ObjectDoesNotExist as exc:
+        _finish_job(job, AiJob.Status.FAILED, error=str(exc))
+        if job.kind in JOB_FAILURE_HANDLERS:
+            JOB_FAILURE_HANDLERS[job.kind](job)
+    except Exception as exc:
+        logger.exception("AI job %s failed", job.id)
+        status = (
+            AiJob.Status.FAILED
+            if job.attempts >= MAX_ATTEMPTS
+            else AiJob.Status.PENDING
+        )
+        _finish_job(job, status, error=str(exc))
+        if status == AiJob.Status.FAILED and job.kind in JOB_FAILURE_HANDLERS:
+            JOB_FAILURE_HANDLERS[job.kind](job)
+    else:
+        _finish_job(job, AiJob.Status.DONE, result=result)
+    return job
+
+
+def _finish_job(job: AiJob, status: str, result=None, error=""):
+    now = timezone.now()
+    job.status = status
+    job.result = result
+    job.error = error
+    if status == AiJob.Status.PENDING:
+        job.finished_at = None
+        job.retry_at = now + RETRY_BACKOFF * 2 ** max(job.attempts - 1, 0)
+    else:
+        job.finished_at = now
+        job.retry_at = None
+    job.save(update_fields=["status", "result", "error", "finished_at", "retry_at"])
+
+
+def _run_job_in_thread(job: AiJob):
+    try:
+        return run_job(job)
+    finally:
+        close_old_connections()
+
+
+def run_worker(concurrency=4, poll_interval=1.0, once=False):
+    """Claim and run jobs until stopped.
+
+    Model calls are I/O bound, so each worker process runs up to
+    ``concurrency`` jobs at once on a thread pool. A new job is claimed as
+    soon as a thread frees up, so one slow job never holds back the others.
+    With ``once`` the worker exits as soon as the queue is empty.
+    """
+    running = set()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            free = concurrency - len(running)
+            jobs = claim_jobs(free) if free else []
+            running.update(executor.submit(_run_job_in_thread, job) for job in jobs)
+            if not running:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                continue
+            # Wakes up when a job finishes, or after ``poll_interval`` to
+            # look for new jobs while the pool still has free threads.
+            done, running = wait(
+                running,
+                timeout=None if len(running) == concurrency else poll_interval,
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                future.result()
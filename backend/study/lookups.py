@@ -0,0 +1,23 @@
+from django.db.models import CharField, TextField
+from django.db.models.lookups import IContains
+
+
+@CharField.register_lookup
+@TextField.register_lookup
+class TrigramIContains(IContains):
+    """``icontains`` written as ``col ILIKE '%term%'`` on PostgreSQL.
+
+    Django compiles ``icontains`` to ``UPPER(col::text) LIKE UPPER(%s)``,
+    which the ``gin_trgm_ops`` indexes on the bare columns cannot serve;
+    ``ILIKE`` on the column itself can. Other databases get ``icontains``.
+    """
+
+    lookup_name = "trgm_icontains"
+
+    def as_sql(self, compiler, connection):
+        return IContains(self.lhs, self.rhs).as_sql(compiler, connection)
+
+    def as_postgresql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs_sql} ILIKE {rhs_sql}", (*lhs_params, *rhs_params)
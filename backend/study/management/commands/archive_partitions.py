@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from study.partitions import archive_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Detach card activity and audit log partitions past the retention "
+        "window, archive them as gzipped JSONL under ARCHIVE_ROOT and drop them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-months",
+            type=int,
+            default=12,
+            help="Full months of history to keep (default: 12).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only list the partitions that would be archived.",
+        )
+
+    def handle(self, *args, keep_months=12, dry_run=False, **options):
+        archived = archive_partitions(
+            keep_months=max(keep_months, 1), dry_run=dry_run
+        )
+        for name, path, rows in archived:
+            if dry_run:
+                self.stdout.write(f"Would archive {name} to {path}")
+            else:
+                self.stdout.write(f"Archived {rows} row(s) of {name} to {path}")
+        verb = "Would archive" if dry_run else "Archived"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(archived)} partition(s)."))
@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Max, Q
+
+from study.models import Card, CardActivity
+from study.partitions import retained_since
+
+
+class Command(BaseCommand):
+    help = "Recompute per-card answer counters from CardActivity history."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Cards processed per batch (default: 5000).",
+        )
+
+    def handle(self, *args, batch_size=5000, **options):
+        cards = Card.objects.all()
+        retained = retained_since(CardActivity)
+        if retained is not None:
+            # Older cards have archived answers the counters still include.
+            cards = cards.filter(created_at__gte=retained)
+            self.stdout.write(
+                f"Activity before {retained:%Y-%m-%d} is archived; "
+                "skipping cards created before then."
+            )
+        last_id = 0
+        updated = 0
+        while True:
+            card_ids = list(
+                cards.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not card_ids:
+                break
+            last_id = card_ids[-1]
+
+            counts = {
+                row["card_id"]: row
+                for row in CardActivity.objects.filter(card_id__in=card_ids)
+                .order_by()
+                .values("card_id")
+                .annotate(
+                    correct=Count(
+                        "id", filter=Q(action=CardActivity.Action.ANSWER_CORRECT)
+                    ),
+                    incorrect=Count(
+                        "id", filter=Q(action=CardActivity.Action.ANSWER_INCORRECT)
+                    ),
+                    last_answered_at=Max(
+                        "created_at",
+                        filter=Q(
+                            action__in=[
+                                CardActivity.Action.ANSWER_CORRECT,
+                                CardActivity.Action.ANSWER_INCORRECT,
+                            ]
+                        ),
+                    ),
+                )
+            }
+            updates = []
+            for card_id in card_ids:
+                row = counts.get(card_id, {})
+                updates.append(
+                    Card(
+                        id=card_id,
+                        correct_count=row.get("correct", 0),
+                        incorrect_count=row.get("incorrect", 0),
+                        last_answered_at=row.get("last_answered_at"),
+                    )
+                )
+            Card.objects.bulk_update(
+                updates, ["correct_count", "incorrect_count", "last_answered_at"]
+            )
+            updated += len(updates)
+            self.stdout.write(f"Backfilled {updated} card(s)...")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {updated} card(s)."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from study.audit import compact_legacy_entries
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite card audit entries that hold full before/after snapshots as "
+        "compact diffs. Run VACUUM afterwards to return the space."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Entries rewritten per transaction.",
+        )
+
+    def handle(self, *args, batch_size=1000, **options):
+        compacted = compact_legacy_entries(batch_size=batch_size)
+        self.stdout.write(
+            self.style.SUCCESS(f"Compacted {compacted} audit log(s).")
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from study.partitions import create_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the monthly partitions of card activity and audit logs for the "
+        "current and upcoming months. Run it at least monthly (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=3,
+            help="Months ahead of the current one to cover (default: 3).",
+        )
+
+    def handle(self, *args, months=3, **options):
+        created = create_partitions(months_ahead=max(months, 0))
+        for name in created:
+            self.stdout.write(f"Created {name}")
+        self.stdout.write(self.style.SUCCESS(f"Created {len(created)} partition(s)."))
@@ -0,0 +1,54 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from study.fitting import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_MIN_SAMPLES,
+    DEFAULT_TARGET_RETENTION,
+    fit_users,
+    users_with_answers,
+)
+
+
+class Command(BaseCommand):
+    help = "Fit per-user scheduler parameters from card answer history."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Only fit the given user id (may be repeated).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes (default: CPU count).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--min-samples", type=int, default=DEFAULT_MIN_SAMPLES)
+        parser.add_argument(
+            "--target-retention", type=float, default=DEFAULT_TARGET_RETENTION
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options["user_ids"] or list(users_with_answers())
+        results = fit_users(
+            user_ids,
+            workers=options["workers"],
+            chunk_size=options["chunk_size"],
+            min_samples=options["min_samples"],
+            target_retention=options["target_retention"],
+        )
+        fitted = 0
+        for result in results:
+            fitted += 1
+            levels = ", ".join(str(level) for level in result["levels"]) or "none"
+            self.stdout.write(
+                f"user {result['user_id']}: {result['samples']} answers, "
+                f"fitted levels: {levels}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Fitted {fitted} user(s)."))
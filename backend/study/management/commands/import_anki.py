@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from study.anki import ANKI_CARD_TYPES, AnkiImportError, anki_rows
+from study.imports import CardImporter
+from study.models import Box
+from study.tts import apply_tts
+
+
+class Command(BaseCommand):
+    help = (
+        "Import an Anki .apkg package or plain-text (CSV/TSV) export into a box. "
+        "Notes are read one at a time and cards are loaded in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the .apkg, .csv, .tsv or .txt file.")
+        parser.add_argument("--user", type=int, required=True, help="Owner user id.")
+        parser.add_argument("--box", type=int, required=True, help="Target box id.")
+        parser.add_argument(
+            "--type",
+            choices=ANKI_CARD_TYPES,
+            default="standard",
+            help="Card type the notes are mapped to (default: standard).",
+        )
+        parser.add_argument(
+            "--language",
+            default="en",
+            help="Text-to-speech language for notes without sound (default: en).",
+        )
+        parser.add_argument("--group-id", default="", help="Group id for every card.")
+
+    def handle(self, *args, path, user, box, **options):
+        try:
+            owner = get_user_model().objects.get(id=user)
+            target = Box.objects.get(id=box, user=owner)
+        except (get_user_model().DoesNotExist, Box.DoesNotExist):
+            raise CommandError("Box not found for that user.")
+
+        importer = CardImporter(
+            owner, target, group_id=options["group_id"], prepare_config=apply_tts
+        )
+        with open(path, "rb") as file:
+            try:
+                importer.run(
+                    anki_rows(
+                        file,
+                        path,
+                        owner,
+                        card_type=options["type"],
+                        language=options["language"],
+                    )
+                )
+            except AnkiImportError as exc:
+                raise CommandError(str(exc))
+        for error in importer.errors:
+            self.stderr.write(f"Note {error['index']}: {error['error']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {importer.created} card(s); "
+                f"skipped {importer.error_count} note(s)."
+            )
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.utils import timezone
+
+from study.models import AiCacheEntry
+
+
+class Command(BaseCommand):
+    help = "Delete expired AI result cache entries."
+
+    def handle(self, *args, **options):
+        deleted, _ = AiCacheEntry.objects.filter(
+            expires_at__lte=timezone.now()
+        ).delete()
+        remaining = AiCacheEntry.objects.aggregate(hits=Sum("hits"))["hits"] or 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} expired entr(ies); "
+                f"{remaining} hit(s) recorded on live entries."
+            )
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from study.content import purge_unused_content
+
+
+class Command(BaseCommand):
+    help = "Delete shared card content that no card references any more."
+
+    def handle(self, *args, **options):
+        deleted = purge_unused_content()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} content row(s)."))
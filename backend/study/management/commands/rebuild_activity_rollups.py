@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from study.rollups import rebuild_activity_rollups, rebuild_floor
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily activity rollups from raw card activity."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Only rebuild rollups for the given user id (may be repeated).",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            help=(
+                "Only rebuild the most recent N days (default: the full "
+                "history still in the database)."
+            ),
+        )
+
+    def handle(self, *args, user_ids=None, days=None, **options):
+        since = None
+        if days is not None:
+            since = timezone.localdate() - timedelta(days=max(days, 1) - 1)
+        floor = rebuild_floor()
+        if floor is not None and (since is None or since < floor):
+            self.stdout.write(
+                f"Activity before {floor} is archived; keeping its rollups."
+            )
+            since = floor
+        written = rebuild_activity_rollups(user_ids=user_ids, since=since)
+        scope = f"since {since}" if since else "for the full history"
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {written} rollup row(s) {scope}.")
+        )
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from study.stats import rebuild_box_stats
+
+
+class Command(BaseCommand):
+    help = "Recount per-box card counters and report any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--box",
+            type=int,
+            action="append",
+            dest="box_ids",
+            help="Only rebuild the given box id (may be repeated).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drift without writing corrected counters.",
+        )
+
+    def handle(self, *args, box_ids=None, dry_run=False, **options):
+        drift = rebuild_box_stats(box_ids=box_ids, dry_run=dry_run)
+        for entry in drift:
+            self.stdout.write(
+                f"box {entry['box_id']}: {entry['field']} "
+                f"stored={entry['stored']} actual={entry['actual']}"
+            )
+        boxes = len({entry["box_id"] for entry in drift})
+        verb = "found" if dry_run else "fixed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Drift {verb} in {boxes} box(es), {len(drift)} counter(s)."
+            )
+        )
@@ -0,0 +1,63 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from study.jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = "Run worker processes that execute queued AI review jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Number of worker processes (default: 1).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Concurrent model calls per process (default: 4).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when the queue is empty (default: 1).",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        worker_options = {
+            "concurrency": options["concurrency"],
+            "poll_interval": options["poll_interval"],
+            "once": options["once"],
+        }
+        processes = options["processes"]
+        if processes <= 1:
+            run_worker(**worker_options)
+            return
+
+        # Forked workers must open their own database connections.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=run_worker, kwargs=worker_options)
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {processes} AI worker process(es).")
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
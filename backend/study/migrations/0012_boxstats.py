@@ -0,0 +1,74 @@
+# Generated by Django 6.0.1 on 2026-10-17 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_box_stats(apps, schema_editor):
+    Box = apps.get_model("study", "Box")
+    BoxStats = apps.get_model("study", "BoxStats")
+    Card = apps.get_model("study", "Card")
+
+    level_counts = {
+        f"level_{level}_cards": Count("id", filter=Q(level=level))
+        for level in range(8)
+    }
+    level_counts["level_8_cards"] = Count("id", filter=Q(level__gte=8))
+    rows = (
+        Card.objects.order_by()
+        .values("box_id")
+        .annotate(
+            total_cards=Count("id"),
+            finished_cards=Count("id", filter=Q(finished=True)),
+            active_cards=Count("id", filter=Q(finished=False, level__gt=0)),
+            **level_counts,
+        )
+    )
+    counts = {row.pop("box_id"): row for row in rows}
+    BoxStats.objects.bulk_create(
+        [
+            BoxStats(box_id=box_id, **counts.get(box_id, {}))
+            for box_id in Box.objects.values_list("id", flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("study", "0011_card_is_important"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BoxStats",
+            fields=[
+                (
+                    "box",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="study.box",
+                    ),
+                ),
+                ("total_cards", models.IntegerField(default=0)),
+                ("finished_cards", models.IntegerField(default=0)),
+                ("active_cards", models.IntegerField(default=0)),
+                ("level_0_cards", models.IntegerField(default=0)),
+                ("level_1_cards", models.IntegerField(default=0)),
+                ("level_2_cards", models.IntegerField(default=0)),
+                ("level_3_cards", models.IntegerField(default=0)),
+                ("level_4_cards", models.IntegerField(default=0)),
+                ("level_5_cards", models.IntegerField(default=0)),
+                ("level_6_cards", models.IntegerField(default=0)),
+                ("level_7_cards", models.IntegerField(default=0)),
+                ("level_8_cards", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_box_stats, migrations.RunPython.noop),
+    ]
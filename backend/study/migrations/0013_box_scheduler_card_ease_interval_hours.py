@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-17 10:03
+
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+LEITNER_HOURS = {2: 12, 3: 24, 4: 48, 5: 96, 6: 168, 7: 336}
+
+
+def backfill_interval_hours(apps, schema_editor):
+    Card = apps.get_model("study", "Card")
+    Card.objects.filter(finished=False, level__in=LEITNER_HOURS).update(
+        interval_hours=Case(
+            *[
+                When(level=level, then=Value(float(hours)))
+                for level, hours in LEITNER_HOURS.items()
+            ],
+            default=Value(0.0),
+            output_field=models.FloatField(),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("study", "0012_boxstats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="box",
+            name="scheduler",
+            field=models.CharField(
+                choices=[("leitner", "Leitner"), ("sm2", "SM-2")],
+                default="leitner",
+                max_length=32,
+            ),
+        ),
+        migrations.AddField(
+            model_name="card",
+            name="ease",
+            field=models.FloatField(default=2.5),
+        ),
+        migrations.AddField(
+            model_name="card",
+            name="interval_hours",
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(backfill_interval_hours, migrations.RunPython.noop),
+    ]
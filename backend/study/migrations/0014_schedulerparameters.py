@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-17 11:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("study", "0013_box_scheduler_card_ease_interval_hours"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SchedulerParameters",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="scheduler_parameters",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("params", models.JSONField(blank=True, default=dict)),
+                ("stability_hours", models.JSONField(blank=True, default=dict)),
+                ("sample_count", models.PositiveIntegerField(default=0)),
+                ("fitted_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-17 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("study", "0016_aicacheentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exercise",
+            name="generation_status",
+            field=models.CharField(
+                choices=[
+                    ("ready", "Ready"),
+                    ("pending", "Pending"),
+                    ("failed", "Failed"),
+                ],
+                default="ready",
+                max_length=16,
+            ),
+        ),
+        migrations.AddField(
+            model_name="exercise",
+            name="generation_error",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name="aijob",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("ai_review", "AI review"),
+                    ("exercise_evaluate", "Exercise evaluate"),
+                    ("generate_exercises", "Generate exercises"),
+                ],
+                max_length=32,
+            ),
+        ),
+    ]
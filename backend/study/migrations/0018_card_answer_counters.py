@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-17 15:30
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("study", "0017_exercise_generation_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="card",
+            name="correct_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="card",
+            name="incorrect_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="card",
+            name="last_answered_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        AddIndexConcurrently(
+            model_name="card",
+            index=models.Index(
+                fields=["user", "-incorrect_count", "-correct_count"],
+                name="study_card_user_id_fc7445_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="card",
+            index=models.Index(
+                fields=["box", "-incorrect_count", "-correct_count"],
+                name="study_card_box_id_11ef76_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    CardActivity = apps.get_model("study", "CardActivity")
+    ActivityRollup = apps.get_model("study", "ActivityRollup")
+    rows = (
+        CardActivity.objects.order_by()
+        .annotate(day=TruncDate("created_at"))
+        .values("user_id", "card__box_id", "day", "action", "card_level")
+        .annotate(total=models.Count("id"))
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        batch.append(
+            ActivityRollup(
+                user_id=row["user_id"],
+                box_id=row["card__box_id"],
+                day=row["day"],
+                action=row["action"],
+                card_level=row["card_level"],
+                count=row["total"],
+            )
+        )
+        if len(batch) >= 2000:
+            ActivityRollup.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ActivityRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("study", "0018_card_answer_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ActivityRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("create", "Create"),
+                            ("activate", "Activate"),
+                            ("answer_correct", "Answer correct"),
+                            ("answer_incorrect", "Answer incorrect"),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                ("card_level", models.PositiveIntegerField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "box",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity_rollups",
+                        to="study.box",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-day"],
+                "indexes": [
+                    models.Index(fields=["box", "day"], name="study_activ_box_id_25932d_idx"),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "day", "box", "action", "card_level"),
+                        name="unique_activity_rollup",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
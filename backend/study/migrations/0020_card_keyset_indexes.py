@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:10
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("study", "0019_activityrollup"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="card",
+            index=models.Index(
+                fields=["user", "created_at", "id"],
+                name="study_card_user_id_3a7bdd_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="card",
+            index=models.Index(
+                fields=["user", "next_review_time", "created_at", "id"],
+                name="study_card_user_id_9e8ac7_idx",
+            ),
+        ),
+    ]
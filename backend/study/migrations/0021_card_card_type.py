@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("study", "0020_card_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="card",
+            name="card_type",
+            field=models.CharField(blank=True, default="", editable=False, max_length=64),
+        ),
+    ]
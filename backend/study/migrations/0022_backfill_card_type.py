@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:41
+
+from django.db import migrations
+from django.db.models import Max, Value
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Coalesce, Left
+
+BATCH_SIZE = 5000
+
+
+def backfill_card_type(apps, schema_editor):
+    Card = apps.get_model("study", "Card")
+    last_id = Card.objects.aggregate(last=Max("id"))["last"] or 0
+    # Each batch is its own short transaction, so rows are only locked
+    # briefly and new writes (which set card_type themselves) keep going.
+    for start in range(0, last_id + 1, BATCH_SIZE):
+        Card.objects.filter(
+            id__gte=start, id__lt=start + BATCH_SIZE, card_type=""
+        ).update(
+            card_type=Left(
+                Coalesce(KeyTextTransform("type", "config"), Value("")), 64
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("study", "0021_card_card_type"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_card_type, migrations.RunPython.noop),
+    ]
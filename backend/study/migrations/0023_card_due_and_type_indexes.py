@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:42
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("study", "0022_backfill_card_type"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="card",
+            index=models.Index(
+                condition=models.Q(("finished", False)),
+                fields=["user", "next_review_time"],
+                name="study_card_user_due_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="card",
+            index=models.Index(
+                fields=["user", "card_type", "level"],
+                name="study_card_user_type_level_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:20
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("study", "0023_card_due_and_type_indexes"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="card",
+            name="display_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:21
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 2000
+
+
+# Frozen copy of ``study.models.card_display_text`` as of this migration.
+def card_display_text(config) -> str:
+    if not isinstance(config, dict):
+        return ""
+    card_type = config.get("type")
+    if card_type == "standard":
+        return config.get("front") or config.get("back") or ""
+    if card_type == "spelling":
+        return config.get("spelling") or config.get("front") or ""
+    if card_type == "word-standard":
+        return config.get("word") or config.get("back") or ""
+    if card_type == "multiple-choice":
+        return config.get("question") or ""
+    if card_type == "ai-reviewer":
+        return config.get("question") or ""
+    if card_type == "german-verb-conjugator":
+        return config.get("verb") or ""
+    return ""
+
+
+def backfill_display_text(apps, schema_editor):
+    Card = apps.get_model("study", "Card")
+    last_id = 0
+    while True:
+        cards = list(
+            Card.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "config")[:BATCH_SIZE]
+        )
+        if not cards:
+            break
+        for card in cards:
+            card.display_text = card_display_text(card.config)
+        # One short transaction per batch keeps row locks brief.
+        with transaction.atomic():
+            Card.objects.bulk_update(cards, ["display_text"])
+        last_id = cards[-1].id
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("study", "0024_trigram_card_display_text"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_display_text, migrations.RunPython.noop),
+    ]
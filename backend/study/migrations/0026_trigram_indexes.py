@@ -0,0 +1,49 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:22
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("study", "0025_backfill_card_display_text"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="box",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"],
+                name="study_box_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="exercise",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"],
+                name="study_exercise_title_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="card",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["group_id"],
+                name="study_card_group_id_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="card",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["display_text"],
+                name="study_card_display_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:05
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("study", "0026_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="card",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+    ]
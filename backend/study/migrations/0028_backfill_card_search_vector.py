@@ -0,0 +1,112 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:06
+
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 1000
+
+# Frozen copy of the search vector helpers in ``study.models`` as of this
+# migration, for the text-to-speech languages cards store.
+SEARCH_CONFIGS = {"en": "english", "de": "german", "es": "spanish", "fr": "french"}
+DEFAULT_SEARCH_CONFIG = "simple"
+GERMAN_VERB_FORMS = ("ich", "du", "er/sie/es", "wir", "ihr", "sie")
+
+
+def search_config_for(language) -> str:
+    code = str(language or "").strip().lower().split("-")[0]
+    return SEARCH_CONFIGS.get(code, DEFAULT_SEARCH_CONFIG)
+
+
+def card_search_parts(config):
+    """Searchable ``(text, search config, weight)`` parts of a card config.
+
+    Text whose language is unknown is indexed with the ``simple``
+    configuration, which matches whole words without stemming.
+    """
+    if not isinstance(config, dict):
+        return []
+    card_type = config.get("type")
+    language = search_config_for(config.get("text_to_speech_language"))
+    if card_type == "standard":
+        parts = [
+            (
+                config.get("front"),
+                search_config_for(config.get("front_text_to_speech_language")),
+                "A",
+            ),
+            (
+                config.get("back"),
+                search_config_for(config.get("back_text_to_speech_language")),
+                "B",
+            ),
+        ]
+    elif card_type == "spelling":
+        parts = [
+            (config.get("spelling"), language, "A"),
+            (config.get("front"), DEFAULT_SEARCH_CONFIG, "B"),
+        ]
+    elif card_type == "word-standard":
+        parts = [
+            (config.get("word"), language, "A"),
+            (config.get("back"), DEFAULT_SEARCH_CONFIG, "B"),
+            (config.get("part_of_speech"), DEFAULT_SEARCH_CONFIG, "C"),
+        ]
+    elif card_type == "multiple-choice":
+        options = config.get("options")
+        parts = [(config.get("question"), language, "A")]
+        if isinstance(options, list):
+            parts.extend((option, language, "B") for option in options)
+    elif card_type == "ai-reviewer":
+        parts = [(config.get("question"), DEFAULT_SEARCH_CONFIG, "A")]
+    elif card_type == "german-verb-conjugator":
+        parts = [(config.get("verb"), "german", "A")]
+        parts.extend((config.get(form), "german", "B") for form in GERMAN_VERB_FORMS)
+    else:
+        parts = []
+    return [
+        (text.strip(), search_config, weight)
+        for text, search_config, weight in parts
+        if isinstance(text, str) and text.strip()
+    ]
+
+
+def card_search_vector(config):
+    """Expression computing a card's ``tsvector`` from its config."""
+    vector = None
+    for text, search_config, weight in card_search_parts(config):
+        part = SearchVector(models.Value(text), config=search_config, weight=weight)
+        vector = part if vector is None else vector + part
+    if vector is None:
+        vector = SearchVector(models.Value(""), config=DEFAULT_SEARCH_CONFIG)
+    return vector
+
+
+def backfill_search_vector(apps, schema_editor):
+    Card = apps.get_model("study", "Card")
+    last_id = 0
+    while True:
+        cards = list(
+            Card.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "config")[:BATCH_SIZE]
+        )
+        if not cards:
+            break
+        for card in cards:
+            card.search_vector = card_search_vector(card.config)
+        with transaction.atomic():
+            Card.objects.bulk_update(cards, ["search_vector"])
+        last_id = cards[-1].id
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("study", "0027_card_search_vector"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
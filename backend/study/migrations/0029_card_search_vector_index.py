@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:07
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("study", "0028_backfill_card_search_vector"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="card",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="study_card_search_vector_idx"
+            ),
+        ),
+    ]
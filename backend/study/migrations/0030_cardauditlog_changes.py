@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("study", "0029_card_search_vector_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cardauditlog",
+            name="changes",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
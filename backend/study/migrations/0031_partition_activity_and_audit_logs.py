@@ -0,0 +1,203 @@
+# Generated by Django 6.0.1 on 2026-10-17 20:10
+
+from django.db import migrations
+
+# Indexes of the partitioned parents keep the names Django gave them, so the
+# model state below stays valid for later migrations.
+TABLES = {
+    "study_cardactivity": (
+        ("study_carda_user_id_ebc9b3_idx", "user_id, created_at"),
+        ("study_carda_card_id_b3bd3d_idx", "card_id, created_at"),
+        ("study_carda_action_e980bf_idx", "action, created_at"),
+    ),
+    "study_cardauditlog": (
+        ("study_carda_user_id_82e9b0_idx", "user_id, created_at"),
+        ("study_carda_card_id_0bf3d1_idx", "card_id, created_at"),
+        ("study_carda_action_0cb6f0_idx", "action, created_at"),
+    ),
+}
+
+# How many months after the current one get a partition up front; the
+# ``create_partitions`` command keeps the window moving.
+MONTHS_AHEAD = 3
+
+PARTITION_SQL = """
+DO $$
+DECLARE
+    parent text := '{table}';
+    legacy text := '{table}_p_legacy';
+    bound timestamptz :=
+        (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '1 month')
+        AT TIME ZONE 'UTC';
+    next_id bigint;
+    counter int := 0;
+    idx record;
+BEGIN
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', parent, legacy);
+    FOR idx IN
+        SELECT indexname FROM pg_indexes
+        WHERE schemaname = current_schema() AND tablename = legacy
+    LOOP
+        counter := counter + 1;
+        EXECUTE format(
+            'ALTER INDEX %I RENAME TO %I', idx.indexname, legacy || '_' || counter
+        );
+    END LOOP;
+
+    -- Identity columns cannot live on a partitioned table before PostgreSQL
+    -- 17; move ids to a plain sequence owned by the new parent.
+    EXECUTE format('SELECT COALESCE(max(id), 0) + 1 FROM %I', legacy)
+        INTO next_id;
+    EXECUTE format(
+        'ALTER TABLE %I ALTER COLUMN id DROP IDENTITY IF EXISTS', legacy
+    );
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN id DROP DEFAULT', legacy);
+
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS) '
+        'PARTITION BY RANGE (created_at)',
+        parent,
+        legacy
+    );
+    EXECUTE format('CREATE SEQUENCE %I OWNED BY %I.id', parent || '_id_seq', parent);
+    PERFORM setval(parent || '_id_seq', next_id, false);
+    EXECUTE format(
+        'ALTER TABLE %I ALTER COLUMN id SET DEFAULT nextval(%L)',
+        parent,
+        parent || '_id_seq'
+    );
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id, created_at)', parent);
+    {indexes}
+    EXECUTE format(
+        'ALTER TABLE %I ADD CONSTRAINT %I FOREIGN KEY (user_id) '
+        'REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED',
+        parent,
+        parent || '_user_id_fk'
+    );
+    EXECUTE format(
+        'ALTER TABLE %I ADD CONSTRAINT %I FOREIGN KEY (card_id) '
+        'REFERENCES study_card (id) DEFERRABLE INITIALLY DEFERRED',
+        parent,
+        parent || '_card_id_fk'
+    );
+
+    -- The existing rows become one partition without being copied. A
+    -- validated CHECK lets ATTACH skip its own scan of the table.
+    EXECUTE format(
+        'ALTER TABLE %I ADD CONSTRAINT %I CHECK (created_at < %L) NOT VALID',
+        legacy,
+        legacy || '_bound',
+        bound
+    );
+    EXECUTE format('ALTER TABLE %I VALIDATE CONSTRAINT %I', legacy, legacy || '_bound');
+    EXECUTE format(
+        'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (MINVALUE) TO (%L)',
+        parent,
+        legacy,
+        bound
+    );
+    EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', legacy, legacy || '_bound');
+
+    -- Rows outside every monthly partition land here instead of failing.
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF %I DEFAULT', parent || '_default', parent
+    );
+    FOR counter IN 0..{months_ahead} LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            parent || '_p' || to_char(bound + counter * interval '1 month', 'YYYYMM'),
+            parent,
+            bound + counter * interval '1 month',
+            bound + (counter + 1) * interval '1 month'
+        );
+    END LOOP;
+END
+$$;
+"""
+
+# Copies the rows back into a plain table with an identity id, as Django
+# created it. Rows of archived (dropped) partitions are not restored.
+UNPARTITION_SQL = """
+DO $$
+DECLARE
+    parent text := '{table}';
+    plain text := '{table}_unpartitioned';
+    next_id bigint;
+BEGIN
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS)', plain, parent);
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN id DROP DEFAULT', plain);
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I', plain, parent);
+    EXECUTE format('SELECT COALESCE(max(id), 0) + 1 FROM %I', plain)
+        INTO next_id;
+    -- Drops the partitions and the id sequence along with the parent.
+    EXECUTE format('DROP TABLE %I', parent);
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', plain, parent);
+
+    EXECUTE format(
+        'ALTER TABLE %I ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY '
+        '(START WITH %s)',
+        parent,
+        next_id
+    );
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id)', parent);
+    {indexes}
+    EXECUTE format('CREATE INDEX %I ON %I (user_id)', parent || '_user_id', parent);
+    EXECUTE format('CREATE INDEX %I ON %I (card_id)', parent || '_card_id', parent);
+    EXECUTE format(
+        'ALTER TABLE %I ADD CONSTRAINT %I FOREIGN KEY (user_id) '
+        'REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED',
+        parent,
+        parent || '_user_id_fk'
+    );
+    EXECUTE format(
+        'ALTER TABLE %I ADD CONSTRAINT %I FOREIGN KEY (card_id) '
+        'REFERENCES study_card (id) DEFERRABLE INITIALLY DEFERRED',
+        parent,
+        parent || '_card_id_fk'
+    );
+END
+$$;
+"""
+
+INDEX_SQL = "EXECUTE format('CREATE INDEX %I ON %I ({columns})', '{name}', parent);"
+
+
+def partition_sql(table, indexes):
+    return PARTITION_SQL.format(
+        table=table,
+        indexes="\n    ".join(
+            INDEX_SQL.format(name=name, columns=columns) for name, columns in indexes
+        ),
+        months_ahead=MONTHS_AHEAD - 1,
+    )
+
+
+def unpartition_sql(table, indexes):
+    return UNPARTITION_SQL.format(
+        table=table,
+        indexes="\n    ".join(
+            INDEX_SQL.format(name=name, columns=columns) for name, columns in indexes
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    """Range-partition activity and audit rows by month of ``created_at``.
+
+    The primary key of a partitioned table has to include the partition
+    key, so the database key becomes ``(id, created_at)``; ids still come
+    from a single sequence and Django keeps treating ``id`` as the pk.
+    Partition bounds are in UTC.
+    """
+
+    dependencies = [
+        ("study", "0030_cardauditlog_changes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            partition_sql(table, indexes),
+            reverse_sql=unpartition_sql(table, indexes),
+        )
+        for table, indexes in TABLES.items()
+    ]
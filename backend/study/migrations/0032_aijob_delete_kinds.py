@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-17 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("study", "0031_partition_activity_and_audit_logs"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="aijob",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("ai_review", "AI review"),
+                    ("exercise_evaluate", "Exercise evaluate"),
+                    ("generate_exercises", "Generate exercises"),
+                    ("delete_box_cards", "Delete box cards"),
+                    ("delete_box", "Delete box"),
+                ],
+                max_length=32,
+            ),
+        ),
+    ]
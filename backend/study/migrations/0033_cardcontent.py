@@ -0,0 +1,59 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("study", "0032_aijob_delete_kinds"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CardContent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hash", models.CharField(max_length=64, unique=True)),
+                ("config", models.JSONField(default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        # ``Card.config`` becomes a property over the card's own config and
+        # its shared content; the column keeps its name.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name="card",
+                    old_name="config",
+                    new_name="own_config",
+                ),
+                migrations.AlterField(
+                    model_name="card",
+                    name="own_config",
+                    field=models.JSONField(db_column="config", default=dict),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="card",
+            name="content",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="cards",
+                to="study.cardcontent",
+            ),
+        ),
+    ]
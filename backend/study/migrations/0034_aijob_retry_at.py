@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("study", "0033_cardcontent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="aijob",
+            name="retry_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-17 22:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("study", "0034_aijob_retry_at"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="aijob",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("ai_review", "AI review"),
+                    ("exercise_evaluate", "Exercise evaluate"),
+                    ("generate_exercises", "Generate exercises"),
+                    ("delete_box_cards", "Delete box cards"),
+                    ("delete_box", "Delete box"),
+                    ("rebuild_rollups", "Rebuild activity rollups"),
+                ],
+                max_length=32,
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-17 22:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("study", "0035_aijob_rebuild_rollups_kind"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="cardauditlog",
+            name="created_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
@@ -1,22 +1,216 @@
+import hashlib
+import json
+
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 
+class BoxQuerySet(models.QuerySet):
+    def with_card_counts(self):
+        ready = (
+            Card.objects.filter(
+                box=models.OuterRef("pk"),
+                finished=False,
+                next_review_time__lte=timezone.now(),
+            )
+            .order_by()
+            .values("box")
+            .annotate(count=models.Count("id"))
+            .values("count")
+        )
+        return self.select_related("stats").annotate(
+            total_cards_count=Coalesce("stats__total_cards", 0),
+            finished_cards_count=Coalesce("stats__finished_cards", 0),
+            active_cards_count=Coalesce("stats__active_cards", 0),
+            ready_cards_count=Coalesce(models.Subquery(ready), 0),
+        )
+
+
+CARD_TYPE_MAX_LENGTH = 64
+
+
+def card_type_for(config) -> str:
+    value = (config or {}).get("type") or ""
+    return str(value)[:CARD_TYPE_MAX_LENGTH]
+
+
+def card_display_text(config) -> str:
+    if not isinstance(config, dict):
+        return ""
+    card_type = config.get("type")
+    if card_type == "standard":
+        return config.get("front") or config.get("back") or ""
+    if card_type == "spelling":
+        return config.get("spelling") or config.get("front") or ""
+    if card_type == "word-standard":
+        return config.get("word") or config.get("back") or ""
+    if card_type == "multiple-choice":
+        return config.get("question") or ""
+    if card_type == "ai-reviewer":
+        return config.get("question") or ""
+    if card_type == "german-verb-conjugator":
+        return config.get("verb") or ""
+    return ""
+
+
+# Text search configurations for the text-to-speech languages cards store.
+SEARCH_CONFIGS = {"en": "english", "de": "german", "es": "spanish", "fr": "french"}
+DEFAULT_SEARCH_CONFIG = "simple"
+GERMAN_VERB_FORMS = ("ich", "du", "er/sie/es", "wir", "ihr", "sie")
+
+
+def search_config_for(language) -> str:
+    code = str(language or "").strip().lower().split("-")[0]
+    return SEARCH_CONFIGS.get(code, DEFAULT_SEARCH_CONFIG)
+
+
+def card_search_parts(config):
+    """Searchable ``(text, search config, weight)`` parts of a card config.
+
+    Text whose language is unknown is indexed with the ``simple``
+    configuration, which matches whole words without stemming.
+    """
+    if not isinstance(config, dict):
+        return []
+    card_type = config.get("type")
+    language = search_config_for(config.get("text_to_speech_language"))
+    if card_type == "standard":
+        parts = [
+            (
+                config.get("front"),
+                search_config_for(config.get("front_text_to_speech_language")),
+                "A",
+            ),
+            (
+                config.get("back"),
+                search_config_for(config.get("back_text_to_speech_language")),
+                "B",
+            ),
+        ]
+    elif card_type == "spelling":
+        parts = [
+            (config.get("spelling"), language, "A"),
+            (config.get("front"), DEFAULT_SEARCH_CONFIG, "B"),
+        ]
+    elif card_type == "word-standard":
+        parts = [
+            (config.get("word"), language, "A"),
+            (config.get("back"), DEFAULT_SEARCH_CONFIG, "B"),
+            (config.get("part_of_speech"), DEFAULT_SEARCH_CONFIG, "C"),
+        ]
+    elif card_type == "multiple-choice":
+        options = config.get("options")
+        parts = [(config.get("question"), language, "A")]
+        if isinstance(options, list):
+            parts.extend((option, language, "B") for option in options)
+    elif card_type == "ai-reviewer":
+        parts = [(config.get("question"), DEFAULT_SEARCH_CONFIG, "A")]
+    elif card_type == "german-verb-conjugator":
+        parts = [(config.get("verb"), "german", "A")]
+        parts.extend((config.get(form), "german", "B") for form in GERMAN_VERB_FORMS)
+    else:
+        parts = []
+    return [
+        (text.strip(), search_config, weight)
+        for text, search_config, weight in parts
+        if isinstance(text, str) and text.strip()
+    ]
+
+
+def card_search_vector(config):
+    """Expression computing a card's ``tsvector`` from its config."""
+    vector = None
+    for text, search_config, weight in card_search_parts(config):
+        part = SearchVector(models.Value(text), config=search_config, weight=weight)
+        vector = part if vector is None else vector + part
+    if vector is None:
+        vector = SearchVector(models.Value(""), config=DEFAULT_SEARCH_CONFIG)
+    return vector
+
+
+def content_hash(config) -> str:
+    """Hash identifying a card config regardless of key order."""
+    encoded = json.dumps(config, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class CardQuerySet(models.QuerySet):
+    """Keeps config-derived card fields in sync on bulk writes, which skip save."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.sync_config_fields()
+        created = super().bulk_create(objs, *args, **kwargs)
+        for obj in objs:
+            obj.clear_search_vector()
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = list(fields)
+        if "config" in fields:
+            for obj in objs:
+                obj.sync_config_fields()
+            fields.remove("config")
+            fields.extend(
+                name
+                for name in Card.CONFIG_STORAGE_FIELDS + Card.CONFIG_DERIVED_FIELDS
+                if name not in fields
+            )
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        for obj in objs:
+            obj.clear_search_vector()
+        return updated
+
+
+class CardContent(models.Model):
+    """Card config shared by every card with identical content.
+
+    Cloned cards point here instead of carrying their own copy of the
+    config; a card gets its own copy again on its first config edit.
+    """
+
+    hash = models.CharField(max_length=64, unique=True)
+    config = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Card content {self.hash[:12]}"
+
+
 class Box(models.Model):
+    class Scheduler(models.TextChoices):
+        LEITNER = "leitner", "Leitner"
+        SM2 = "sm2", "SM-2"
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="boxes"
     )
     name = models.CharField(max_length=120)
     description = models.TextField(blank=True)
     share_code = models.CharField(max_length=64, blank=True, null=True, unique=True)
+    scheduler = models.CharField(
+        max_length=32, choices=Scheduler.choices, default=Scheduler.LEITNER
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BoxQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["user", "created_at"]),
+            GinIndex(
+                fields=["name"],
+                opclasses=["gin_trgm_ops"],
+                name="study_box_name_trgm_idx",
+            ),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -27,25 +221,63 @@ class Box(models.Model):
     def __str__(self):
         return f"{self.name} ({self.user_id})"
 
+    # The counters below prefer values annotated by
+    # BoxQuerySet.with_card_counts() and only fall back to a COUNT query.
     @property
     def total_cards(self):
+        if hasattr(self, "total_cards_count"):
+            return self.total_cards_count
         return self.cards.count()
 
     @property
     def finished_cards(self):
+        if hasattr(self, "finished_cards_count"):
+            return self.finished_cards_count
         return self.cards.filter(finished=True).count()
 
     @property
     def ready_cards(self):
+        if hasattr(self, "ready_cards_count"):
+            return self.ready_cards_count
         return self.cards.filter(
             finished=False, next_review_time__lte=timezone.now()
         ).count()
 
     @property
     def active_cards(self):
+        if hasattr(self, "active_cards_count"):
+            return self.active_cards_count
         return self.cards.filter(finished=False).exclude(level=0).count()
 
 
+class BoxStats(models.Model):
+    """Denormalized card counters for a box, maintained by ``study.stats``."""
+
+    box = models.OneToOneField(
+        Box, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    total_cards = models.IntegerField(default=0)
+    finished_cards = models.IntegerField(default=0)
+    active_cards = models.IntegerField(default=0)
+    level_0_cards = models.IntegerField(default=0)
+    level_1_cards = models.IntegerField(default=0)
+    level_2_cards = models.IntegerField(default=0)
+    level_3_cards = models.IntegerField(default=0)
+    level_4_cards = models.IntegerField(default=0)
+    level_5_cards = models.IntegerField(default=0)
+    level_6_cards = models.IntegerField(default=0)
+    level_7_cards = models.IntegerField(default=0)
+    level_8_cards = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for box {self.box_id}"
+
+    @property
+    def level_counts(self):
+        return {str(level): getattr(self, f"level_{level}_cards") for level in range(9)}
+
+
 class Card(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="cards"
@@ -57,8 +289,34 @@ class Card(models.Model):
     level = models.PositiveIntegerField(default=0)
     group_id = models.CharField(max_length=120, blank=True)
     next_review_time = models.DateTimeField(null=True, blank=True)
+    ease = models.FloatField(default=2.5)
+    interval_hours = models.FloatField(default=0)
     is_important = models.BooleanField(default=False)
-    config = models.JSONField(default=dict)
+    correct_count = models.PositiveIntegerField(default=0)
+    incorrect_count = models.PositiveIntegerField(default=0)
+    last_answered_at = models.DateTimeField(null=True, blank=True)
+    # The card's own config; unused while ``content`` is set. Read and write
+    # both through ``config``.
+    own_config = models.JSONField(default=dict, db_column="config")
+    content = models.ForeignKey(
+        CardContent,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="cards",
+    )
+    # Copies of config values so filters and search can use indexes.
+    card_type = models.CharField(
+        max_length=CARD_TYPE_MAX_LENGTH, blank=True, default="", editable=False
+    )
+    display_text = models.TextField(blank=True, default="", editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    CONFIG_STORAGE_FIELDS = ("own_config", "content")
+    CONFIG_DERIVED_FIELDS = ("card_type", "display_text", "search_vector")
+
+    objects = CardQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_at"]
@@ -66,11 +324,94 @@ class Card(models.Model):
             models.Index(fields=["box", "created_at"]),
             models.Index(fields=["box", "finished"]),
             models.Index(fields=["box", "next_review_time"]),
+            models.Index(fields=["user", "-incorrect_count", "-correct_count"]),
+            models.Index(fields=["box", "-incorrect_count", "-correct_count"]),
+            # Keyset pagination of the card list in both orderings.
+            models.Index(fields=["user", "created_at", "id"]),
+            models.Index(fields=["user", "next_review_time", "created_at", "id"]),
+            models.Index(
+                fields=["user", "next_review_time"],
+                condition=models.Q(finished=False),
+                name="study_card_user_due_idx",
+            ),
+            models.Index(
+                fields=["user", "card_type", "level"],
+                name="study_card_user_type_level_idx",
+            ),
+            GinIndex(
+                fields=["group_id"],
+                opclasses=["gin_trgm_ops"],
+                name="study_card_group_id_trgm_idx",
+            ),
+            GinIndex(
+                fields=["display_text"],
+                opclasses=["gin_trgm_ops"],
+                name="study_card_display_trgm_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="study_card_search_vector_idx"),
         ]
 
     def __str__(self):
         return f"Card {self.id} ({self.box_id})"
 
+    @property
+    def config(self):
+        if self.content_id is not None:
+            return self.content.config
+        return self.own_config
+
+    @config.setter
+    def config(self, value):
+        # Copy on write: an edited card stops sharing its content.
+        self.own_config = value
+        self.content = None
+
+    def sync_config_fields(self):
+        self.card_type = card_type_for(self.config)
+        self.display_text = card_display_text(self.config)
+        # Evaluated by the database as part of the INSERT or UPDATE.
+        self.search_vector = card_search_vector(self.config)
+
+    def clear_search_vector(self):
+        """Defer ``search_vector`` once the expression has been written.
+
+        A later read then loads the stored value instead of seeing the
+        expression, and a later save does not send it again.
+        """
+        if isinstance(self.__dict__.get("search_vector"), models.Expression):
+            del self.__dict__["search_vector"]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "config" in update_fields:
+            self.sync_config_fields()
+        if update_fields is not None and "config" in update_fields:
+            kwargs["update_fields"] = {
+                *(name for name in update_fields if name != "config"),
+                *self.CONFIG_STORAGE_FIELDS,
+                *self.CONFIG_DERIVED_FIELDS,
+            }
+        super().save(*args, **kwargs)
+        self.clear_search_vector()
+
+
+class SchedulerParameters(models.Model):
+    """Per-user scheduler parameters fitted from ``CardActivity`` history."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="scheduler_parameters",
+    )
+    params = models.JSONField(default=dict, blank=True)
+    stability_hours = models.JSONField(default=dict, blank=True)
+    sample_count = models.PositiveIntegerField(default=0)
+    fitted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Scheduler parameters for {self.user_id}"
+
 
 class CardActivity(models.Model):
     class Action(models.TextChoices):
@@ -104,6 +445,38 @@ class CardActivity(models.Model):
         return f"{self.action} (card {self.card_id})"
 
 
+class ActivityRollup(models.Model):
+    """Daily activity counts backing the activity charts."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="activity_rollups",
+    )
+    box = models.ForeignKey(
+        Box, on_delete=models.CASCADE, related_name="activity_rollups"
+    )
+    day = models.DateField()
+    action = models.CharField(max_length=32, choices=CardActivity.Action.choices)
+    card_level = models.PositiveIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-day"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "day", "box", "action", "card_level"],
+                name="unique_activity_rollup",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["box", "day"]),
+        ]
+
+    def __str__(self):
+        return f"{self.action} x{self.count} on {self.day} (box {self.box_id})"
+
+
 class CardAuditLog(models.Model):
     class Action(models.TextChoices):
         CREATE = "create", "Create"
@@ -127,10 +500,15 @@ class CardAuditLog(models.Model):
         related_name="audit_logs",
     )
     action = models.CharField(max_length=32, choices=Action.choices)
+    # Full snapshots, only set on entries written before ``changes``.
     before_data = models.JSONField(null=True, blank=True)
     after_data = models.JSONField(null=True, blank=True)
+    # Compact diff, see ``study.audit.diff_snapshots``.
+    changes = models.JSONField(default=dict, blank=True)
     metadata = models.JSONField(default=dict, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the change is recorded (see ``study.audit.record_audit``), not
+    # when a buffered entry is finally inserted.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
@@ -170,6 +548,11 @@ class AiReviewLog(models.Model):
 
 
 class Exercise(models.Model):
+    class GenerationStatus(models.TextChoices):
+        READY = "ready", "Ready"
+        PENDING = "pending", "Pending"
+        FAILED = "failed", "Failed"
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -179,6 +562,12 @@ class Exercise(models.Model):
     question_making_prompt = models.TextField()
     evaluate_prompt = models.TextField()
     exercises = models.JSONField(default=list, blank=True)
+    generation_status = models.CharField(
+        max_length=16,
+        choices=GenerationStatus.choices,
+        default=GenerationStatus.READY,
+    )
+    generation_error = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -187,6 +576,11 @@ class Exercise(models.Model):
         indexes = [
             models.Index(fields=["user", "created_at"]),
             models.Index(fields=["user", "title"]),
+            GinIndex(
+                fields=["title"],
+                opclasses=["gin_trgm_ops"],
+                name="study_exercise_title_trgm_idx",
+            ),
         ]
 
     def __str__(self):
@@ -217,3 +611,67 @@ class ExerciseHistory(models.Model):
 
     def __str__(self):
         return f"Exercise history {self.id} ({self.exercise_id})"
+
+
+class AiJob(models.Model):
+    class Kind(models.TextChoices):
+        AI_REVIEW = "ai_review", "AI review"
+        EXERCISE_EVALUATE = "exercise_evaluate", "Exercise evaluate"
+        GENERATE_EXERCISES = "generate_exercises", "Generate exercises"
+        DELETE_BOX_CARDS = "delete_box_cards", "Delete box cards"
+        DELETE_BOX = "delete_box", "Delete box"
+        REBUILD_ROLLUPS = "rebuild_rollups", "Rebuild activity rollups"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="ai_jobs",
+    )
+    kind = models.CharField(max_length=32, choices=Kind.choices)
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.PENDING
+    )
+    payload = models.JSONField(default=dict)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # A failed attempt is not retried before this time.
+    retry_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["user", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job {self.id} ({self.status})"
+
+
+class AiCacheEntry(models.Model):
+    """Persistent tier of the AI result cache, keyed by a content hash."""
+
+    key = models.CharField(max_length=64, unique=True)
+    kind = models.CharField(max_length=32)
+    result = models.JSONField(default=dict)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["expires_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} cache {self.key[:12]}"
@@ -1,6 +1,189 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+FALSE_VALUES = {"0", "false", "no"}
+
+
+def _keyset_ordering(queryset):
+    """Ordering of ``queryset`` as ``(field, descending)`` pairs ending in pk."""
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+    keys = []
+    for name in ordering:
+        if not isinstance(name, str) or "__" in name:
+            return None
+        descending = name.startswith("-")
+        name = name.lstrip("-")
+        name = "id" if name == "pk" else name
+        try:
+            queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        keys.append((name, descending))
+    if not keys or keys[-1][0] != "id":
+        keys.append(("id", keys[-1][1] if keys else False))
+    return keys
+
+
+def _after(model, keys, values):
+    """Rows sorting strictly after ``values`` under ``keys``.
+
+    NULLs sort last ascending and first descending, as in PostgreSQL.
+    """
+    (name, descending), rest = keys[0], keys[1:]
+    value = values[0]
+    tail = _after(model, rest, values[1:]) if rest else None
+    if value is None:
+        if descending:
+            condition = Q(**{f"{name}__isnull": False})
+            if tail is not None:
+                condition |= Q(**{f"{name}__isnull": True}) & tail
+            return condition
+        if tail is None:
+            return Q(pk__in=[])
+        return Q(**{f"{name}__isnull": True}) & tail
+
+    nulls_after = not descending and model._meta.get_field(name).null
+    condition = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+    if nulls_after:
+        condition |= Q(**{f"{name}__isnull": True})
+    if tail is not None:
+        condition |= Q(**{name: value}) & tail
+        # Redundant with the OR, but Postgres cannot turn an OR into an
+        # index range bound; this inclusive bound lets the scan start at the
+        # cursor instead of filtering every row before it.
+        bound = Q(**{f"{name}__{'lte' if descending else 'gte'}": value})
+        if nulls_after:
+            bound |= Q(**{f"{name}__isnull": True})
+        condition &= bound
+    return condition
 
 
 class StandardResultsSetPagination(PageNumberPagination):
+    """Page-number pagination with opt-in keyset (cursor) mode.
+
+    Passing ``cursor`` (empty for the first page) switches to keyset
+    pagination over the queryset's ordering with ``id`` as the tie breaker,
+    so each page is an index range scan instead of an ``OFFSET``. Cursor
+    pages only link forward. Passing ``count=false`` skips the ``COUNT(*)``
+    in either mode.
+    """
+
     page_size_query_param = "page_size"
     max_page_size = 200
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.mode = "page"
+        self.include_count = (
+            request.query_params.get(self.count_query_param, "").strip().lower()
+            not in FALSE_VALUES
+        )
+        if self.cursor_query_param in request.query_params:
+            keys = _keyset_ordering(queryset)
+            if keys is not None:
+                self.mode = "cursor"
+                return self._paginate_keyset(queryset, request, keys)
+        if not self.include_count:
+            self.mode = "uncounted"
+            return self._paginate_uncounted(queryset, request)
+        return super().paginate_queryset(queryset, request, view=view)
+
+    def _paginate_keyset(self, queryset, request, keys):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        if self.include_count:
+            self.total = queryset.count()
+        ordered = queryset.order_by(
+            *(f"-{name}" if descending else name for name, descending in keys)
+        )
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            values = self._decode_cursor(cursor, queryset.model, keys)
+            ordered = ordered.filter(_after(queryset.model, keys, values))
+
+        rows = list(ordered[: page_size + 1])
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_cursor = (
+            self._encode_cursor(rows[-1], keys) if self.has_next else None
+        )
+        return rows
+
+    def _paginate_uncounted(self, queryset, request):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+        except (TypeError, ValueError):
+            self.page_number = 1
+        if self.page_number < 1:
+            raise NotFound("Invalid page.")
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset : offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    @staticmethod
+    def _encode_cursor(row, keys):
+        values = []
+        for name, _ in keys:
+            value = getattr(row, name)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor, model, keys):
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+            if not isinstance(values, list) or len(values) != len(keys):
+                raise ValueError
+            return [
+                None if value is None else model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(keys, values)
+            ]
+        except (ValueError, TypeError, DjangoValidationError):
+            raise NotFound("Invalid cursor.")
+
+    def get_next_link(self):
+        if self.mode == "page":
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.mode == "cursor":
+            return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.mode == "page":
+            return super().get_previous_link()
+        if self.mode == "cursor" or self.page_number <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        if self.mode == "page":
+            return super().get_paginated_response(data)
+        payload = OrderedDict()
+        if self.include_count:
+            payload["count"] = self.total
+        payload["next"] = self.get_next_link()
+        payload["previous"] = self.get_previous_link()
+        payload["results"] = data
+        return Response(payload)
@@ -0,0 +1,215 @@
+import gzip
+import os
+import re
+from collections import namedtuple
+from datetime import date, datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import CardActivity, CardAuditLog
+
+# Tables range-partitioned by month of ``created_at`` (migration 0031).
+PARTITIONED_MODELS = (CardActivity, CardAuditLog)
+ARCHIVE_CHUNK_SIZE = 2000
+
+Partition = namedtuple("Partition", ["name", "lower", "upper"])
+
+_BOUNDS = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def _month_start(value: date):
+    return date(value.year, value.month, 1)
+
+
+def _add_months(month: date, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_bound(month: date):
+    # Partition bounds are UTC month starts.
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _parse_bound(value):
+    if value == "MINVALUE":
+        return None
+    value = value.strip("'")
+    if re.search(r"[+-]\d\d$", value):
+        value += ":00"
+    return datetime.fromisoformat(value)
+
+
+def partition_name(table, month: date):
+    return f"{table}_p{month:%Y%m}"
+
+
+def list_partitions(table):
+    """Range partitions attached to ``table``, oldest first.
+
+    The default partition is left out. ``lower`` is ``None`` for the
+    partition holding the rows from before partitioning.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [table],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, bound in rows:
+        match = _BOUNDS.search(bound)
+        if match is None:
+            continue
+        lower, upper = match.groups()
+        partitions.append(Partition(name, _parse_bound(lower), _parse_bound(upper)))
+    return sorted(partitions, key=lambda partition: partition.upper)
+
+
+def retained_since(model):
+    """Start of the raw history of ``model`` still in the database.
+
+    ``None`` while nothing has been archived; otherwise the lower bound of
+    the oldest partition left, since older rows were archived and dropped.
+    """
+    partitions = list_partitions(model._meta.db_table)
+    if not partitions or partitions[0].lower is None:
+        return None
+    return partitions[0].lower
+
+
+def _detached_partitions(table):
+    """Monthly tables detached by an earlier run that never got archived."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT relname FROM pg_class
+            WHERE relkind = 'r' AND NOT relispartition
+              AND starts_with(relname, %s) AND relname <> %s
+            """,
+            [f"{table}_p", table],
+        )
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+def _create_partition(table, name, lower, upper):
+    quote = connection.ops.quote_name
+    default = quote(f"{table}_default")
+    in_range = "created_at >= %s AND created_at < %s"
+    with transaction.atomic(), connection.cursor() as cursor:
+        # A partition cannot be attached over rows already sitting in the
+        # default partition, so move those into it first.
+        cursor.execute(
+            f"CREATE TABLE {quote(name)} (LIKE {quote(table)} INCLUDING DEFAULTS)"
+        )
+        cursor.execute(
+            f"INSERT INTO {quote(name)} SELECT * FROM {default} WHERE {in_range}",
+            [lower, upper],
+        )
+        cursor.execute(f"DELETE FROM {default} WHERE {in_range}", [lower, upper])
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(name)} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            [lower, upper],
+        )
+
+
+def create_partitions(months_ahead=3, today=None):
+    """Create missing partitions up to ``months_ahead`` months from now.
+
+    Covers the current month too, on every partitioned table. Returns the
+    names of the partitions created.
+    """
+    current = _month_start(today or timezone.now().date())
+    created = []
+    for model in PARTITIONED_MODELS:
+        table = model._meta.db_table
+        existing = list_partitions(table)
+        for offset in range(months_ahead + 1):
+            month = _add_months(current, offset)
+            lower = _month_bound(month)
+            upper = _month_bound(_add_months(month, 1))
+            if any(
+                lower < partition.upper
+                and (partition.lower is None or partition.lower < upper)
+                for partition in existing
+            ):
+                continue
+            name = partition_name(table, month)
+            _create_partition(table, name, lower, upper)
+            existing.append(Partition(name, lower, upper))
+            created.append(name)
+    return created
+
+
+def archive_path(table, name):
+    return Path(settings.ARCHIVE_ROOT) / table / f"{name}.jsonl.gz"
+
+
+def _archive(name, path):
+    """Write every row of ``name`` to ``path`` as gzipped JSON lines."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f"{path.name}.part")
+    written = 0
+    with transaction.atomic(), connection.chunked_cursor() as cursor:
+        cursor.execute(
+            f"SELECT row_to_json(t)::text FROM {connection.ops.quote_name(name)} t "
+            "ORDER BY t.created_at, t.id"
+        )
+        with gzip.open(partial, "wt", encoding="utf-8") as handle:
+            while rows := cursor.fetchmany(ARCHIVE_CHUNK_SIZE):
+                handle.writelines(f"{row[0]}\n" for row in rows)
+                written += len(rows)
+    os.replace(partial, path)
+    return written
+
+
+def archive_partitions(keep_months=12, today=None, dry_run=False):
+    """Detach, archive and drop partitions older than ``keep_months``.
+
+    A partition qualifies once all of its rows are older than the first of
+    the month ``keep_months`` months back. Detaching and dropping are
+    catalog operations, so removing a year of history never runs a
+    ``DELETE``. Each partition is written to
+    ``ARCHIVE_ROOT/<table>/<partition>.jsonl.gz`` before it is
+    dropped; tables left detached by an interrupted run are picked up again.
+    Returns ``(partition, path, rows)`` tuples (``rows`` is ``None`` on a
+    dry run).
+    """
+    cutoff = _month_bound(
+        _add_months(_month_start(today or timezone.now().date()), -keep_months)
+    )
+    quote = connection.ops.quote_name
+    archived = []
+    for model in PARTITIONED_MODELS:
+        table = model._meta.db_table
+        expired = [
+            partition.name
+            for partition in list_partitions(table)
+            if partition.upper <= cutoff
+        ]
+        names = _detached_partitions(table) + expired
+        if dry_run:
+            archived.extend((name, archive_path(table, name), None) for name in names)
+            continue
+        for name in expired:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}"
+                )
+        for name in names:
+            path = archive_path(table, name)
+            rows = _archive(name, path)
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE {quote(name)}")
+            archived.append((name, path, rows))
+    return archived
@@ -0,0 +1,201 @@
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, DateTimeField, F, Func, Value
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.utils import timezone
+
+from .models import ActivityRollup, CardActivity
+from .partitions import retained_since
+
+ROLLUP_BATCH_SIZE = 2000
+
+
+def user_timezone(user):
+    try:
+        return user.profile.tzinfo
+    except ObjectDoesNotExist:
+        return timezone.get_default_timezone()
+
+
+def local_date(field, timezone_field="user__profile__timezone"):
+    """SQL date of ``field`` in the time zone stored on the owning profile.
+
+    Lets a single query bucket rows of users in different time zones.
+    """
+    zone = Coalesce(F(timezone_field), Value(settings.TIME_ZONE))
+    return Cast(
+        Func(zone, F(field), function="timezone", output_field=DateTimeField()),
+        output_field=DateField(),
+    )
+
+
+def _apply(counts: Counter):
+    # Sorted so concurrent writers lock rollup rows in the same order.
+    for key in sorted(counts):
+        value = counts[key]
+        if not value:
+            continue
+        user_id, box_id, day, action, card_level = key
+        rows = ActivityRollup.objects.filter(
+            user_id=user_id,
+            box_id=box_id,
+            day=day,
+            action=action,
+            card_level=card_level,
+        )
+        if value < 0:
+            rows.update(count=Greatest(F("count") + value, Value(0)))
+            continue
+        if rows.update(count=F("count") + value):
+            continue
+        try:
+            with transaction.atomic():
+                ActivityRollup.objects.create(
+                    user_id=user_id,
+                    box_id=box_id,
+                    day=day,
+                    action=action,
+                    card_level=card_level,
+                    count=value,
+                )
+        except IntegrityError:
+            rows.update(count=F("count") + value)
+
+
+def record_activity(activities):
+    """Add freshly written ``CardActivity`` rows to the daily rollups.
+
+    Must be called inside the transaction that writes the activity rows,
+    after they have been saved.
+    """
+    zones = {}
+    counts = Counter()
+    for activity in activities:
+        if activity.user_id not in zones:
+            zones[activity.user_id] = user_timezone(activity.user)
+        day = timezone.localdate(activity.created_at, zones[activity.user_id])
+        counts[
+            (
+                activity.user_id,
+                activity.card.box_id,
+                day,
+                activity.action,
+                activity.card_level,
+            )
+        ] += 1
+    _apply(counts)
+
+
+def _card_activity_counts(card_ids):
+    rows = (
+        CardActivity.objects.filter(card_id__in=card_ids)
+        .order_by()
+        .annotate(day=local_date("created_at"))
+        .values("user_id", "card__box_id", "day", "action", "card_level")
+        .annotate(total=Count("id"))
+    )
+    return Counter(
+        {
+            (
+                row["user_id"],
+                row["card__box_id"],
+                row["day"],
+                row["action"],
+                row["card_level"],
+            ): row["total"]
+            for row in rows
+        }
+    )
+
+
+def discard_card_activity(card_ids):
+    """Remove the activity of ``card_ids`` from the rollups.
+
+    Call before the cards are deleted, or before they move to another box
+    (followed by ``restore_card_activity`` once they have moved).
+    """
+    counts = _card_activity_counts(card_ids)
+    _apply(Counter({key: -value for key, value in counts.items()}))
+
+
+def restore_card_activity(card_ids):
+    _apply(_card_activity_counts(card_ids))
+
+
+def discard_box_activity(box_id):
+    """Drop all rollups of a box before every card in it is deleted."""
+    ActivityRollup.objects.filter(box_id=box_id).delete()
+
+
+def rebuild_floor():
+    """First day rollups can be rebuilt for, or ``None`` for any day.
+
+    Once activity partitions are archived, the rollups are the only record
+    of the archived days. A local day can start up to a day before the UTC
+    bound of the oldest partition left, so that day is skipped too.
+    """
+    retained = retained_since(CardActivity)
+    if retained is None:
+        return None
+    return retained.date() + timedelta(days=1)
+
+
+def rebuild_activity_rollups(user_ids=None, since=None):
+    """Recompute rollups from ``CardActivity``.
+
+    Only rows for ``user_ids`` and days from ``since`` onwards are rebuilt
+    when given. Days are derived in the database from each user's time zone,
+    so this is also how rollups are re-bucketed after a time zone change.
+    ``since`` is raised to ``rebuild_floor()`` so a rebuild never wipes the
+    counts of archived days. Returns the number of rollup rows written.
+    """
+    floor = rebuild_floor()
+    if floor is not None and (since is None or since < floor):
+        since = floor
+    activities = CardActivity.objects.order_by().annotate(
+        day=local_date("created_at")
+    )
+    rollups = ActivityRollup.objects.all()
+    if user_ids is not None:
+        activities = activities.filter(user_id__in=user_ids)
+        rollups = rollups.filter(user_id__in=user_ids)
+    if since is not None:
+        # UTC offsets stay within a day, so the coarse bound keeps the
+        # (user, created_at) index usable before the exact local-day filter.
+        lower = timezone.make_aware(datetime.combine(since, time.min))
+        activities = activities.filter(
+            created_at__gte=lower - timedelta(days=1), day__gte=since
+        )
+        rollups = rollups.filter(day__gte=since)
+    rows = (
+        activities.values("user_id", "card__box_id", "day", "action", "card_level")
+        .annotate(total=Count("id"))
+    )
+
+    written = 0
+    with transaction.atomic():
+        rollups.delete()
+        batch = []
+        for row in rows.iterator(chunk_size=ROLLUP_BATCH_SIZE):
+            batch.append(
+                ActivityRollup(
+                    user_id=row["user_id"],
+                    box_id=row["card__box_id"],
+                    day=row["day"],
+                    action=row["action"],
+                    card_level=row["card_level"],
+                    count=row["total"],
+                )
+            )
+            if len(batch) >= ROLLUP_BATCH_SIZE:
+                ActivityRollup.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            ActivityRollup.objects.bulk_create(batch)
+            written += len(batch)
+    return written
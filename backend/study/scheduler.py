@@ -0,0 +1,302 @@
+from dataclasses import dataclass
+from datetime import timedelta
+
+import numpy as np
+
+from .audit import audit_entry
+from .models import Box, Card, CardAuditLog, SchedulerParameters
+
+FINISHED_LEVEL = 8
+MAX_ACTIVE_LEVEL = FINISHED_LEVEL - 1
+
+
+@dataclass
+class ScheduleBatch:
+    """Scheduling state for a set of cards, one array element per card.
+
+    ``interval_hours`` is NaN for cards that are not scheduled (not yet
+    activated, or finished).
+    """
+
+    level: np.ndarray
+    finished: np.ndarray
+    ease: np.ndarray
+    interval_hours: np.ndarray
+
+    def __len__(self):
+        return len(self.level)
+
+    @classmethod
+    def from_values(cls, levels, finished, eases, intervals):
+        return cls(
+            level=np.asarray(levels, dtype=np.int64),
+            finished=np.asarray(finished, dtype=bool),
+            ease=np.asarray(eases, dtype=np.float64),
+            interval_hours=np.asarray(intervals, dtype=np.float64),
+        )
+
+    @classmethod
+    def from_cards(cls, cards):
+        return cls.from_values(
+            [card.level for card in cards],
+            [card.finished for card in cards],
+            [card.ease for card in cards],
+            [card.interval_hours for card in cards],
+        )
+
+
+class BaseScheduler:
+    """Computes the next scheduling state for cards.
+
+    Subclasses implement the vectorized ``review_many`` and
+    ``reschedule_many``; ``review_cards`` applies a batch result to card
+    instances and single-card reviews go through it with a batch of one so
+    both stay in sync.
+    """
+
+    name = ""
+
+    def review_many(self, batch: ScheduleBatch, correct) -> ScheduleBatch:
+        raise NotImplementedError
+
+    def reschedule_many(self, batch: ScheduleBatch) -> ScheduleBatch:
+        raise NotImplementedError
+
+    def review_card(self, card: Card, is_correct: bool, now):
+        return self.review_cards([card], [is_correct], [now])[0]
+
+    def review_cards(self, cards, correct, answered_at):
+        """Review distinct ``cards`` in place with one ``review_many`` call.
+
+        ``correct`` and ``answered_at`` hold one value per card; a card's next
+        review time is counted from its own answer time.
+        """
+        result = self.review_many(
+            ScheduleBatch.from_cards(cards), np.asarray(correct, dtype=bool)
+        )
+        for index, card in enumerate(cards):
+            card.level = int(result.level[index])
+            card.finished = bool(result.finished[index])
+            card.ease = float(result.ease[index])
+            interval = result.interval_hours[index]
+            if np.isnan(interval):
+                card.interval_hours = 0.0
+                card.next_review_time = None
+            else:
+                card.interval_hours = float(interval)
+                card.next_review_time = answered_at[index] + timedelta(
+                    hours=float(interval)
+                )
+        return cards
+
+    @staticmethod
+    def _finish(level, correct):
+        level = np.where(correct, level + 1, 1)
+        finished = correct & (level > MAX_ACTIVE_LEVEL)
+        return np.where(finished, FINISHED_LEVEL, level), finished
+
+
+class LeitnerScheduler(BaseScheduler):
+    """Fixed per-level intervals; a wrong answer resets the card to level 1."""
+
+    name = Box.Scheduler.LEITNER
+    default_schedule_hours = {
+        1: 0,
+        2: 12,
+        3: 24,
+        4: 48,
+        5: 96,
+        6: 168,
+        7: 336,
+    }
+
+    def __init__(self, params=None):
+        schedule_hours = {
+            **self.default_schedule_hours,
+            **{
+                int(level): hours
+                for level, hours in (params or {}).get("schedule_hours", {}).items()
+            },
+        }
+        self.hours = np.array(
+            [0.0]
+            + [
+                float(schedule_hours.get(level, 0))
+                for level in range(1, FINISHED_LEVEL)
+            ]
+        )
+
+    def _hours_for(self, level):
+        return self.hours[np.clip(level, 0, MAX_ACTIVE_LEVEL)]
+
+    def review_many(self, batch, correct):
+        correct = np.asarray(correct, dtype=bool)
+        level, finished = self._finish(batch.level, correct)
+        interval = np.where(finished, np.nan, self._hours_for(level))
+        return ScheduleBatch(level, finished, batch.ease.copy(), interval)
+
+    def reschedule_many(self, batch):
+        scheduled = ~batch.finished & (batch.level > 0)
+        interval = np.where(scheduled, self._hours_for(batch.level), np.nan)
+        return ScheduleBatch(
+            batch.level.copy(), batch.finished.copy(), batch.ease.copy(), interval
+        )
+
+
+class SM2Scheduler(BaseScheduler):
+    """SM-2 style scheduling with a per-card ease factor.
+
+    Intervals grow geometrically by the card's ease after the first two
+    steps. Correct answers raise the ease, wrong answers lower it and reset
+    the card to level 1. Cards still finish after ``MAX_ACTIVE_LEVEL``
+    correct answers in a row so box counters keep their meaning.
+    """
+
+    name = Box.Scheduler.SM2
+    default_params = {
+        "first_interval_hours": 24.0,
+        "second_interval_hours": 144.0,
+        "min_ease": 1.3,
+        "ease_bonus": 0.1,
+        "ease_penalty": 0.32,
+    }
+
+    def __init__(self, params=None):
+        self.params = {**self.default_params, **(params or {})}
+
+    def review_many(self, batch, correct):
+        correct = np.asarray(correct, dtype=bool)
+        params = self.params
+        level, finished = self._finish(batch.level, correct)
+        ease = np.where(
+            correct,
+            batch.ease + params["ease_bonus"],
+            batch.ease - params["ease_penalty"],
+        )
+        ease = np.maximum(ease, params["min_ease"])
+        previous = np.nan_to_num(batch.interval_hours, nan=0.0)
+        grown = np.maximum(previous, params["second_interval_hours"]) * ease
+        interval = np.select(
+            [level <= 1, level == 2, level == 3],
+            [0.0, params["first_interval_hours"], params["second_interval_hours"]],
+            default=grown,
+        )
+        interval = np.where(finished, np.nan, interval)
+        return ScheduleBatch(level, finished, ease, interval)
+
+    def reschedule_many(self, batch):
+        params = self.params
+        ease = np.maximum(batch.ease, params["min_ease"])
+        steps = np.maximum(batch.level - 3, 0)
+        grown = params["second_interval_hours"] * np.power(ease, steps)
+        interval = np.select(
+            [batch.level <= 1, batch.level == 2, batch.level == 3],
+            [0.0, params["first_interval_hours"], params["second_interval_hours"]],
+            default=grown,
+        )
+        scheduled = ~batch.finished & (batch.level > 0)
+        interval = np.where(scheduled, interval, np.nan)
+        return ScheduleBatch(batch.level.copy(), batch.finished.copy(), ease, interval)
+
+
+SCHEDULERS = {
+    Box.Scheduler.LEITNER: LeitnerScheduler,
+    Box.Scheduler.SM2: SM2Scheduler,
+}
+
+
+def get_scheduler(name: str | None = None, params=None) -> BaseScheduler:
+    return SCHEDULERS.get(name, LeitnerScheduler)(params)
+
+
+def load_user_parameters(user) -> dict:
+    """Fitted per-scheduler parameters for ``user``, keyed by scheduler name."""
+    params = (
+        SchedulerParameters.objects.filter(user=user)
+        .values_list("params", flat=True)
+        .first()
+    )
+    return params or {}
+
+
+def get_user_scheduler(name: str | None, user_params: dict) -> BaseScheduler:
+    return get_scheduler(name, user_params.get(name or Box.Scheduler.LEITNER))
+
+
+def reschedule_cards(queryset, scheduler: BaseScheduler, now, user, chunk_size=2000):
+    """Recompute intervals and due times for every card in ``queryset``.
+
+    Cards are streamed in chunks; each chunk is rescheduled with one
+    vectorized call and written back with a single ``bulk_update``, along
+    with an audit entry by ``user`` for every card whose due time moved. A
+    card keeps its last review time as the anchor, so only the interval
+    changes. Returns the number of cards written.
+    """
+    rows = queryset.order_by().values_list(
+        "id", "level", "finished", "ease", "interval_hours", "next_review_time"
+    )
+    updated = 0
+    chunk = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            updated += _reschedule_chunk(chunk, scheduler, now, user)
+            chunk = []
+    if chunk:
+        updated += _reschedule_chunk(chunk, scheduler, now, user)
+    return updated
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _reschedule_chunk(rows, scheduler, now, user):
+    ids, levels, finished, eases, intervals, due_times = zip(*rows)
+    batch = ScheduleBatch.from_values(levels, finished, eases, intervals)
+    result = scheduler.reschedule_many(batch)
+
+    now_ts = now.timestamp()
+    due = np.array(
+        [value.timestamp() if value else np.nan for value in due_times],
+        dtype=np.float64,
+    )
+    anchor = np.where(np.isnan(due), now_ts, due - batch.interval_hours * 3600)
+    new_due = anchor + result.interval_hours * 3600
+
+    cards = []
+    for index, card_id in enumerate(ids):
+        interval = result.interval_hours[index]
+        scheduled = not np.isnan(interval)
+        cards.append(
+            Card(
+                id=card_id,
+                ease=float(result.ease[index]),
+                interval_hours=float(interval) if scheduled else 0.0,
+                next_review_time=(
+                    now + timedelta(seconds=float(new_due[index] - now_ts))
+                    if scheduled
+                    else None
+                ),
+            )
+        )
+    Card.objects.bulk_update(cards, ["ease", "interval_hours", "next_review_time"])
+    # Written with the chunk rather than through ``record_audit`` so a large
+    # box does not hold every entry in memory until the request ends. The
+    # card history is rebuilt from these diffs, so no due time change may go
+    # unrecorded.
+    CardAuditLog.objects.bulk_create(
+        [
+            audit_entry(
+                user=user,
+                card=card,
+                action=CardAuditLog.Action.UPDATE,
+                before={"next_review_time": _isoformat(previous)},
+                after={"next_review_time": _isoformat(card.next_review_time)},
+                metadata={"source": "reschedule", "scheduler": scheduler.name},
+            )
+            for card, previous in zip(cards, due_times)
+            if card.next_review_time != previous
+        ]
+    )
+    return len(cards)
@@ -0,0 +1,82 @@
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db import connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+
+from .models import DEFAULT_SEARCH_CONFIG, SEARCH_CONFIGS, search_config_for
+
+
+def search_cards(queryset, term):
+    """Filter ``queryset`` to cards matching ``term``, best matches first.
+
+    On PostgreSQL matching uses the ``pg_trgm`` GIN indexes on
+    ``display_text`` and ``group_id`` (``trgm_icontains`` compiles to
+    ``ILIKE`` and, like the word similarity operator, is index-backed) and
+    results are ranked by word similarity.
+    Other databases fall back to substring matching ranked by prefix.
+    """
+    term = term.strip()
+    if not term:
+        return queryset
+    if connections[queryset.db].vendor == "postgresql":
+        matches = (
+            Q(display_text__trgm_icontains=term)
+            | Q(display_text__trigram_word_similar=term)
+            | Q(group_id__trgm_icontains=term)
+        )
+        rank = Greatest(
+            TrigramWordSimilarity(term, "display_text"),
+            TrigramWordSimilarity(term, "group_id"),
+        )
+    else:
+        matches = Q(display_text__icontains=term) | Q(group_id__icontains=term)
+        rank = Case(
+            When(display_text__iexact=term, then=Value(1.0)),
+            When(display_text__istartswith=term, then=Value(0.75)),
+            default=Value(0.5),
+            output_field=FloatField(),
+        )
+    return (
+        queryset.filter(matches)
+        .annotate(search_rank=rank)
+        .order_by("-search_rank", "-created_at")
+    )
+
+
+def search_card_content(queryset, text, language=None):
+    """Full-text search over card content, best matches first.
+
+    ``text`` uses web search syntax (quoted phrases, ``or``, ``-word``). With
+    ``language`` the query is stemmed for that language only; otherwise it is
+    matched against every configuration cards are indexed with.
+    """
+    text = text.strip()
+    if not text:
+        return queryset
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.filter(display_text__icontains=text).annotate(
+            search_rank=Value(1.0, output_field=FloatField())
+        )
+    if language:
+        configs = [search_config_for(language)]
+    else:
+        configs = sorted({*SEARCH_CONFIGS.values(), DEFAULT_SEARCH_CONFIG})
+    query = reduce(
+        or_,
+        (
+            SearchQuery(text, config=config, search_type="websearch")
+            for config in configs
+        ),
+    )
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(search_rank=SearchRank(F("search_vector"), query))
+        .order_by("-search_rank", "-created_at")
+    )
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Box, Card, Exercise, ExerciseHistory
+from .models import AiJob, Box, Card, Exercise, ExerciseHistory
 
 
 class BoxSerializer(serializers.ModelSerializer):
@@ -14,6 +14,7 @@ class BoxSerializer(serializers.ModelSerializer):
             "id",
             "name",
             "description",
+            "scheduler",
             "total_cards",
             "finished_cards",
             "ready_cards",
@@ -29,6 +30,8 @@ class CardSerializer(serializers.ModelSerializer):
         source="box", queryset=Box.objects.all(), write_only=True
     )
     box = serializers.PrimaryKeyRelatedField(read_only=True)
+    # Resolves shared content; assigning it gives the card its own copy.
+    config = serializers.JSONField(required=False)
 
     class Meta:
         model = Card
@@ -42,9 +45,11 @@ class CardSerializer(serializers.ModelSerializer):
             "next_review_time",
             "is_important",
             "config",
+            "card_type",
             "created_at",
             "updated_at",
         )
+        read_only_fields = ("card_type",)
 
 
 class ExerciseSerializer(serializers.ModelSerializer):
@@ -59,11 +64,14 @@ class ExerciseSerializer(serializers.ModelSerializer):
             "question_making_prompt",
             "evaluate_prompt",
             "exercises",
+            "generation_status",
+            "generation_error",
             "history_count",
             "success_count",
             "created_at",
             "updated_at",
         )
+        read_only_fields = ("generation_status", "generation_error")
 
 
 class ExerciseHistorySerializer(serializers.ModelSerializer):
@@ -76,3 +84,19 @@ class ExerciseHistorySerializer(serializers.ModelSerializer):
             "review",
             "created_at",
         )
+
+
+class AiJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AiJob
+        fields = (
+            "id",
+            "kind",
+            "status",
+            "result",
+            "error",
+            "attempts",
+            "created_at",
+            "started_at",
+            "finished_at",
+        )
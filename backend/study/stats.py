@@ -0,0 +1,129 @@
+from collections import Counter
+
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Box, BoxStats, Card
+
+MAX_LEVEL = 8
+COUNTER_FIELDS = (
+    "total_cards",
+    "finished_cards",
+    "active_cards",
+    *(f"level_{level}_cards" for level in range(MAX_LEVEL + 1)),
+)
+
+
+def card_state(card: Card):
+    return (card.finished, card.level)
+
+
+def _state_counters(finished: bool, level: int):
+    counters = Counter(total_cards=1)
+    if finished:
+        counters["finished_cards"] += 1
+    elif level > 0:
+        counters["active_cards"] += 1
+    counters[f"level_{min(level, MAX_LEVEL)}_cards"] += 1
+    return counters
+
+
+def record_card_changes(box_id: int, added=(), removed=()):
+    """Apply card state transitions to the box counters.
+
+    ``added`` and ``removed`` are iterables of ``(finished, level)`` states, as
+    returned by ``card_state``. Must be called inside the transaction that
+    writes the cards, after the card rows have been written.
+    """
+    delta = Counter()
+    for state in added:
+        delta.update(_state_counters(*state))
+    for state in removed:
+        delta.subtract(_state_counters(*state))
+
+    updates = {name: F(name) + value for name, value in delta.items() if value}
+    if not updates:
+        return
+    updated = BoxStats.objects.filter(box_id=box_id).update(
+        **updates, updated_at=timezone.now()
+    )
+    if not updated:
+        rebuild_box_stats(box_ids=[box_id])
+
+
+def count_box_cards(box_ids=None):
+    queryset = Card.objects.order_by()
+    if box_ids is not None:
+        queryset = queryset.filter(box_id__in=box_ids)
+    level_counts = {
+        f"level_{level}_cards": Count("id", filter=Q(level=level))
+        for level in range(MAX_LEVEL)
+    }
+    level_counts[f"level_{MAX_LEVEL}_cards"] = Count(
+        "id", filter=Q(level__gte=MAX_LEVEL)
+    )
+    rows = queryset.values("box_id").annotate(
+        total_cards=Count("id"),
+        finished_cards=Count("id", filter=Q(finished=True)),
+        active_cards=Count("id", filter=Q(finished=False, level__gt=0)),
+        **level_counts,
+    )
+    return {row.pop("box_id"): row for row in rows}
+
+
+def rebuild_box_stats(box_ids=None, dry_run=False):
+    """Recount box counters from the cards table.
+
+    Returns a list of ``{"box_id", "field", "stored", "actual"}`` entries for
+    every counter that had drifted. With ``dry_run`` nothing is written.
+    """
+    boxes = Box.objects.order_by("id")
+    if box_ids is not None:
+        boxes = boxes.filter(id__in=box_ids)
+    box_ids = list(boxes.values_list("id", flat=True))
+
+    actual_counts = count_box_cards(box_ids)
+    stored = {
+        stats.box_id: stats
+        for stats in BoxStats.objects.filter(box_id__in=box_ids)
+    }
+
+    drift = []
+    to_create = []
+    to_update = []
+    for box_id in box_ids:
+        actual = actual_counts.get(box_id, {})
+        stats = stored.get(box_id)
+        changed = False
+        is_new = stats is None
+        if is_new:
+            stats = BoxStats(box_id=box_id)
+            to_create.append(stats)
+        for field in COUNTER_FIELDS:
+            value = actual.get(field, 0)
+            current = getattr(stats, field)
+            if current != value:
+                drift.append(
+                    {
+                        "box_id": box_id,
+                        "field": field,
+                        "stored": None if is_new else current,
+                        "actual": value,
+                    }
+                )
+                setattr(stats, field, value)
+                changed = True
+        if changed and not is_new:
+            to_update.append(stats)
+
+    if not dry_run:
+        if to_create:
+            BoxStats.objects.bulk_create(to_create, ignore_conflicts=True)
+        if to_update:
+            now = timezone.now()
+            for stats in to_update:
+                stats.updated_at = now
+            BoxStats.objects.bulk_update(
+                to_update, [*COUNTER_FIELDS, "updated_at"], batch_size=500
+            )
+    return drift
@@ -1,3 +1,300 @@
-from django.test import TestCase
+import random
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .audit import audit_entry, card_history, card_snapshot, record_audit
+from .imports import CardImporter
+from .models import Box, Card, CardAuditLog
+from .pagination import StandardResultsSetPagination
+from .scheduler import (
+    FINISHED_LEVEL,
+    MAX_ACTIVE_LEVEL,
+    LeitnerScheduler,
+    ScheduleBatch,
+    SM2Scheduler,
+)
+
+NOW = datetime(2026, 10, 17, 12, 0, tzinfo=dt_timezone.utc)
+
+SEARCH_CONFIGS = [
+    {
+        "type": "standard",
+        "front": "The running dogs",
+        "back": "Die laufenden Hunde",
+        "front_text_to_speech_language": "en-US",
+        "back_text_to_speech_language": "de",
+    },
+    {
+        "type": "multiple-choice",
+        "question": "Which of these are fruits?",
+        "options": ["apples", "the", "  ", "cars", 3, "bananas"],
+        "text_to_speech_language": "en",
+    },
+    {
+        "type": "german-verb-conjugator",
+        "verb": "gehen",
+        "ich": "gehe",
+        "du": "gehst",
+        "wir": "gehen",
+    },
+    {"type": "word-standard", "word": "run", "back": "laufen", "part_of_speech": ""},
+    {"type": "unknown", "front": "ignored"},
+]
+
+
+def _next_level(level, correct):
+    """Scalar level step: ``(level, finished)`` after one answer."""
+    if not correct:
+        return 1, False
+    if level + 1 > MAX_ACTIVE_LEVEL:
+        return FINISHED_LEVEL, True
+    return level + 1, False
+
+
+def leitner_review(card, correct, hours):
+    level, finished = _next_level(card.level, correct)
+    interval = None if finished else float(hours[level])
+    return level, finished, card.ease, interval
+
+
+def sm2_review(card, correct, params):
+    level, finished = _next_level(card.level, correct)
+    if correct:
+        ease = card.ease + params["ease_bonus"]
+    else:
+        ease = card.ease - params["ease_penalty"]
+    ease = max(ease, params["min_ease"])
+    if finished:
+        interval = None
+    elif level <= 1:
+        interval = 0.0
+    elif level == 2:
+        interval = params["first_interval_hours"]
+    elif level == 3:
+        interval = params["second_interval_hours"]
+    else:
+        interval = max(card.interval_hours, params["second_interval_hours"]) * ease
+    return level, finished, ease, interval
+
+
+def random_cards(rng, count):
+    cards = []
+    for _ in range(count):
+        level = rng.randint(0, MAX_ACTIVE_LEVEL)
+        cards.append(
+            Card(
+                level=level,
+                finished=False,
+                ease=rng.uniform(1.3, 3.0),
+                interval_hours=rng.choice([0.0, rng.uniform(0, 2000)]),
+                next_review_time=None,
+            )
+        )
+    return cards
+
+
+def copy_card(card):
+    return Card(
+        level=card.level,
+        finished=card.finished,
+        ease=card.ease,
+        interval_hours=card.interval_hours,
+        next_review_time=card.next_review_time,
+    )
+
+
+class SchedulerTests(SimpleTestCase):
+    def setUp(self):
+        rng = random.Random(4)
+        self.cards = random_cards(rng, 300)
+        self.correct = [rng.random() < 0.7 for _ in self.cards]
+        self.answered_at = [
+            NOW + timedelta(minutes=rng.randint(0, 600)) for _ in self.cards
+        ]
+
+    def assert_matches_reference(self, scheduler, reference):
+        batch = [copy_card(card) for card in self.cards]
+        scheduler.review_cards(batch, self.correct, self.answered_at)
+        for card, reviewed, correct, answered_at in zip(
+            self.cards, batch, self.correct, self.answered_at
+        ):
+            single = scheduler.review_card(copy_card(card), correct, answered_at)
+            level, finished, ease, interval = reference(card, correct)
+            for result in (reviewed, single):
+                self.assertEqual(result.level, level)
+                self.assertEqual(result.finished, finished)
+                self.assertAlmostEqual(result.ease, ease)
+                if interval is None:
+                    self.assertEqual(result.interval_hours, 0.0)
+                    self.assertIsNone(result.next_review_time)
+                else:
+                    self.assertAlmostEqual(result.interval_hours, interval)
+                    self.assertEqual(
+                        result.next_review_time,
+                        answered_at + timedelta(hours=result.interval_hours),
+                    )
+
+    def test_leitner_batch_matches_per_card_review(self):
+        scheduler = LeitnerScheduler({"schedule_hours": {"3": 30}})
+        hours = {**LeitnerScheduler.default_schedule_hours, 3: 30}
+        self.assert_matches_reference(
+            scheduler, lambda card, correct: leitner_review(card, correct, hours)
+        )
+
+    def test_sm2_batch_matches_per_card_review(self):
+        scheduler = SM2Scheduler({"min_ease": 1.5})
+        self.assert_matches_reference(
+            scheduler,
+            lambda card, correct: sm2_review(card, correct, scheduler.params),
+        )
+
+    def test_sm2_reschedule_grows_by_ease(self):
+        scheduler = SM2Scheduler()
+        params = scheduler.params
+        batch = ScheduleBatch.from_values(
+            [0, 1, 2, 3, 5, 7, 8],
+            [False, False, False, False, False, False, True],
+            [2.5, 2.5, 2.5, 2.5, 2.0, 1.0, 2.5],
+            [0.0] * 7,
+        )
+        result = scheduler.reschedule_many(batch)
+        expected = [
+            np.nan,
+            0.0,
+            params["first_interval_hours"],
+            params["second_interval_hours"],
+            params["second_interval_hours"] * 2.0**2,
+            params["second_interval_hours"] * params["min_ease"] ** 4,
+            np.nan,
+        ]
+        np.testing.assert_allclose(result.interval_hours, expected)
+
+
+class StudyTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("learner", password="x")
+        self.box = Box.objects.create(user=self.user, name="Words")
+
+    def create_card(self, **fields):
+        config = fields.pop("config", {"type": "standard", "front": "a", "back": "b"})
+        return Card.objects.create(
+            user=self.user, box=self.box, config=config, **fields
+        )
+
+
+class CursorPaginationTests(StudyTestCase):
+    def setUp(self):
+        super().setUp()
+        due = [None, NOW, NOW, NOW + timedelta(hours=1), None, NOW, NOW]
+        for next_review_time in due * 3:
+            self.create_card(level=1, next_review_time=next_review_time)
+        # Ties on every key but the id.
+        Card.objects.filter(id__in=Card.objects.order_by("id")[:10]).update(
+            created_at=NOW
+        )
+
+    def collect(self, queryset, page_size):
+        paginator = StandardResultsSetPagination()
+        factory = APIRequestFactory()
+        cursor, ids = "", []
+        while True:
+            params = {"cursor": cursor, "page_size": page_size}
+            request = Request(factory.get("/api/cards/", params))
+            page = paginator.paginate_queryset(queryset, request)
+            self.assertEqual(paginator.mode, "cursor")
+            ids.extend(card.id for card in page)
+            if paginator.next_cursor is None:
+                return ids
+            cursor = paginator.next_cursor
+
+    def assert_pages_cover(self, queryset):
+        ordered = queryset.order_by(*queryset.query.order_by, "id")
+        expected = list(ordered.values_list("id", flat=True))
+        for page_size in (1, 2, 3, 5, 50):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.collect(queryset, page_size), expected)
+
+    def test_ascending_nullable_key_with_ties(self):
+        self.assert_pages_cover(
+            Card.objects.filter(user=self.user).order_by(
+                "next_review_time", "created_at"
+            )
+        )
+
+    def test_descending_keys_with_ties(self):
+        self.assert_pages_cover(
+            Card.objects.filter(user=self.user).order_by(
+                "-next_review_time", "-created_at"
+            )
+        )
+
+
+class CardHistoryTests(StudyTestCase):
+    def record(self, card, action, before):
+        after = card_snapshot(card)
+        record_audit([audit_entry(self.user, card, action, before, after)])
+        return after
+
+    def test_rebuilds_each_state_newest_first(self):
+        card = self.create_card()
+        states = [self.record(card, CardAuditLog.Action.CREATE, {})]
+
+        before = card_snapshot(card)
+        card.config = {"type": "standard", "front": "a", "back": "c", "hint": "h"}
+        card.save()
+        states.append(self.record(card, CardAuditLog.Action.UPDATE, before))
+
+        before = card_snapshot(card)
+        card.level = 2
+        card.next_review_time = NOW
+        card.save()
+        states.append(self.record(card, CardAuditLog.Action.REVIEW, before))
+
+        before = card_snapshot(card)
+        card.config = {"type": "standard", "front": "z", "back": "c"}
+        card.is_important = True
+        card.save()
+        states.append(self.record(card, CardAuditLog.Action.UPDATE, before))
+
+        history = card_history(Card.objects.get(id=card.id))
+        self.assertEqual([state for _, state in history], states[::-1])
+
+    def test_state_at_a_moment(self):
+        card = self.create_card()
+        created = self.record(card, CardAuditLog.Action.CREATE, {})
+        before = card_snapshot(card)
+        card.level = 3
+        card.save()
+        self.record(card, CardAuditLog.Action.REVIEW, before)
+        first, second = CardAuditLog.objects.filter(card=card).order_by("id")
+        CardAuditLog.objects.filter(id=first.id).update(created_at=NOW)
+        CardAuditLog.objects.filter(id=second.id).update(
+            created_at=NOW + timedelta(hours=2)
+        )
+
+        card = Card.objects.get(id=card.id)
+        self.assertEqual(card_history(card, at=NOW + timedelta(hours=1)), created)
+        self.assertIsNone(card_history(card, at=NOW - timedelta(hours=1)))
+        self.assertEqual(
+            card_history(card, at=NOW + timedelta(hours=3)), card_snapshot(card)
+        )
+
+
+class ImportSearchVectorTests(StudyTestCase):
+    def test_imported_cards_match_saved_cards(self):
+        importer = CardImporter(self.user, self.box).run(enumerate(SEARCH_CONFIGS))
+        self.assertEqual(importer.created, len(SEARCH_CONFIGS))
+        self.assertEqual(importer.errors, [])
+        saved = [self.create_card(config=config).id for config in SEARCH_CONFIGS]
+        vectors = dict(Card.objects.values_list("id", "search_vector"))
+        imported = sorted(set(vectors) - set(saved))
+        self.assertEqual(
+            [vectors[card_id] for card_id in imported],
+            [vectors[card_id] for card_id in saved],
+        )
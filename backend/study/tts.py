@@ -0,0 +1,39 @@
+from base64 import b64encode
+
+
+def tts_voice_name(language: str | None):
+    lang = (language or "en").strip().lower()
+    if lang in {"de", "de-de", "german"}:
+        return "Klaus22k_nt"
+    return "Ryan22k_NT"
+
+
+def tts_url(text: str, language: str | None):
+    encoded = b64encode(text.encode("utf-8")).decode("ascii")
+    voice = tts_voice_name(language)
+    return (
+        "https://voice.reverso.net/RestPronunciation.svc/v1/output=json/"
+        f"GetVoiceStream/voiceName={voice}?inputText={encoded}"
+    )
+
+
+def apply_tts(config: dict):
+    card_type = config.get("type")
+    if card_type in {"spelling", "word-standard", "multiple-choice"}:
+        text = config.get("text_to_speech")
+        if text and not config.get("voice_file_url"):
+            config["voice_file_url"] = tts_url(
+                text, config.get("text_to_speech_language")
+            )
+    if card_type == "standard":
+        front_text = config.get("front_text_to_speech")
+        if front_text and not config.get("front_voice_file_url"):
+            config["front_voice_file_url"] = tts_url(
+                front_text, config.get("front_text_to_speech_language")
+            )
+        back_text = config.get("back_text_to_speech")
+        if back_text and not config.get("back_voice_file_url"):
+            config["back_voice_file_url"] = tts_url(
+                back_text, config.get("back_text_to_speech_language")
+            )
+    return config
@@ -1,12 +1,21 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
-from .views import ActivityViewSet, BoxViewSet, CardViewSet, ExerciseViewSet
+from .views import (
+    ActivityViewSet,
+    AiJobViewSet,
+    BoxViewSet,
+    CardViewSet,
+    ExerciseViewSet,
+    ExportViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"boxes", BoxViewSet, basename="box")
 router.register(r"cards", CardViewSet, basename="card")
 router.register(r"exercises", ExerciseViewSet, basename="exercise")
 router.register(r"activity", ActivityViewSet, basename="activity")
+router.register(r"ai-jobs", AiJobViewSet, basename="ai-job")
+router.register(r"export", ExportViewSet, basename="export")
 
 urlpatterns = [
     path("", include(router.urls)),
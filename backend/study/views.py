@@ -1,26 +1,41 @@
-from base64 import b64encode
 from datetime import date, timedelta
 from uuid import uuid4
 
-from django.db.models import Count, Q, Case, When, IntegerField
-from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
-from django.urls import reverse_lazy
+import numpy as np
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import (
+    Greatest,
+    TruncDay,
+    TruncHour,
+    TruncMonth,
+    TruncWeek,
+)
+from django.urls import reverse
 from django.utils import timezone
-from google import genai
+from django.utils.dateparse import parse_datetime
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from .ai_models import (
-    ExerciseItems,
-    ExerciseReview,
-    Review,
-    prompt_ai_review,
-    prompt_exercise_questions,
-)
+from .activation import activate_box_cards
+from .ai import run_ai_review, run_exercise_evaluation
+from .ai_cache import get_cache
+from .ai_client import get_provider
+from .anki import ANKI_CARD_TYPES, AnkiImportError, anki_rows
+from .audit import audit_entry, card_history, card_snapshot, record_audit
+from .content import clone_box_cards
+from .deletion import delete_box, delete_box_cards
+from .exports import box_records, stream_ndjson, user_records
+from .forecast import level_intervals, pass_rates, simulate_reviews
+from .imports import CardImporter, card_from_payload, csv_rows, ndjson_rows
+from .jobs import EXERCISE_LOW_WATERMARK, enqueue_job, request_exercise_generation
 from .models import (
-    AiReviewLog,
+    ActivityRollup,
+    AiCacheEntry,
+    AiJob,
     Box,
     Card,
     CardActivity,
@@ -28,12 +43,29 @@ from .models import (
     Exercise,
     ExerciseHistory,
 )
+from .pagination import StandardResultsSetPagination
+from .rollups import (
+    discard_card_activity,
+    record_activity,
+    restore_card_activity,
+    user_timezone,
+)
+from .scheduler import (
+    FINISHED_LEVEL,
+    get_user_scheduler,
+    load_user_parameters,
+    reschedule_cards,
+)
+from .search import search_card_content, search_cards
 from .serializers import (
+    AiJobSerializer,
     BoxSerializer,
     CardSerializer,
     ExerciseSerializer,
     ExerciseHistorySerializer,
 )
+from .stats import card_state, record_card_changes
+from .tts import apply_tts
 
 
 class BoxViewSet(viewsets.ModelViewSet):
@@ -41,21 +73,46 @@ class BoxViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        queryset = Box.objects.filter(user=self.request.user).order_by("-created_at")
+        queryset = (
+            Box.objects.filter(user=self.request.user)
+            .with_card_counts()
+            .order_by("-created_at")
+        )
         ready_only = self.request.query_params.get("ready_only")
         if ready_only == "1":
-            queryset = queryset.filter(
-                cards__finished=False, cards__next_review_time__lte=timezone.now()
-            ).distinct()
+            queryset = queryset.filter(ready_cards_count__gt=0)
         search = self.request.query_params.get("search")
         if search:
-            queryset = queryset.filter(name__icontains=search)
+            queryset = queryset.filter(name__trgm_icontains=search)
         return queryset
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def destroy(self, request, *args, **kwargs):
+        box = self.get_object()
+        if _parse_bool(request.query_params.get("async", False)):
+            job = enqueue_job(request.user, AiJob.Kind.DELETE_BOX, {"box_id": box.id})
+            return _job_accepted_response(job)
+        delete_box(box, request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous_scheduler = serializer.instance.scheduler
+        box = serializer.save()
+        if box.scheduler != previous_scheduler:
+            reschedule_cards(
+                Card.objects.filter(box=box),
+                get_user_scheduler(
+                    box.scheduler, load_user_parameters(self.request.user)
+                ),
+                timezone.now(),
+                self.request.user,
+            )
+
     @action(detail=True, methods=["post"], url_path="activate-cards")
+    @transaction.atomic
     def activate_cards(self, request, pk=None):
         box = self.get_object()
         raw_count = request.data.get("count")
@@ -66,111 +123,68 @@ class BoxViewSet(viewsets.ModelViewSet):
         if count <= 0:
             raise ValidationError({"count": "Count must be greater than zero."})
 
-        cards = (
-            Card.objects.filter(
-                box=box,
-                user=request.user,
-                level=0,
-                next_review_time__isnull=True,
-            )
-            .order_by("created_at")
-            .only("id", "group_id", "created_at", "level")
-        )
-
-        groups = []
-        seen = set()
-        for card in cards:
-            group_key = card.group_id.strip() if card.group_id else f"id:{card.id}"
-            if group_key in seen:
-                continue
-            seen.add(group_key)
-            groups.append(group_key)
-            if len(groups) >= count:
-                break
-
-        if not groups:
-            return Response({"activated": 0, "groups": []})
-
-        group_ids = [g for g in groups if not g.startswith("id:")]
-        id_groups = [int(g.split("id:")[1]) for g in groups if g.startswith("id:")]
-
         now = timezone.now()
-        updated = 0
-        cards_to_activate = []
-        if group_ids:
-            queryset = Card.objects.filter(
-                box=box,
-                user=request.user,
-                level=0,
-                next_review_time__isnull=True,
-                group_id__in=group_ids,
-            )
-            cards_to_activate.extend(list(queryset))
-            updated += queryset.update(level=1, next_review_time=now)
+        activated = activate_box_cards(box, request.user, count, now)
+        if not activated:
+            return Response({"activated": 0, "groups": []})
 
-        if id_groups:
-            queryset = Card.objects.filter(
-                box=box,
-                user=request.user,
-                level=0,
-                next_review_time__isnull=True,
-                id__in=id_groups,
-            )
-            cards_to_activate.extend(list(queryset))
-            updated += queryset.update(level=1, next_review_time=now)
-
-        if cards_to_activate:
-            CardActivity.objects.bulk_create(
-                [
-                    CardActivity(
-                        user=request.user,
-                        card=card,
-                        action=CardActivity.Action.ACTIVATE,
-                        card_level=card.level,
-                    )
-                    for card in cards_to_activate
-                ]
-            )
-            CardAuditLog.objects.bulk_create(
-                [
-                    CardAuditLog(
-                        user=request.user,
-                        card=card,
-                        action=CardAuditLog.Action.ACTIVATE,
-                        before_data=_card_snapshot(card),
-                        after_data={
-                            **_card_snapshot(card),
-                            "level": 1,
-                            "next_review_time": now.isoformat(),
-                        },
-                    )
-                    for card in cards_to_activate
-                ]
-            )
+        groups = list(dict.fromkeys(card.group_key for card in activated))
+        activities = CardActivity.objects.bulk_create(
+            [
+                CardActivity(
+                    user=request.user,
+                    card=card,
+                    action=CardActivity.Action.ACTIVATE,
+                    card_level=0,
+                )
+                for card in activated
+            ]
+        )
+        record_activity(activities)
+        record_audit(
+            [
+                audit_entry(
+                    user=request.user,
+                    card=card,
+                    action=CardAuditLog.Action.ACTIVATE,
+                    before={
+                        **card_snapshot(card),
+                        "level": 0,
+                        "next_review_time": None,
+                    },
+                    after=card_snapshot(card),
+                )
+                for card in activated
+            ]
+        )
+        record_card_changes(
+            box.id,
+            added=[(False, 1)] * len(activated),
+            removed=[(False, 0)] * len(activated),
+        )
 
-        return Response({"activated": updated, "groups": groups})
+        return Response({"activated": len(activated), "groups": groups})
 
     @action(detail=True, methods=["post"], url_path="delete-cards")
     def delete_cards(self, request, pk=None):
         box = self.get_object()
-        cards = list(Card.objects.filter(box=box, user=request.user))
-        if cards:
-            CardAuditLog.objects.bulk_create(
-                [
-                    CardAuditLog(
-                        user=request.user,
-                        card=card,
-                        action=CardAuditLog.Action.BULK_DELETE,
-                        before_data=_card_snapshot(card),
-                        after_data=None,
-                        metadata={"source": "delete_cards"},
-                    )
-                    for card in cards
-                ]
+        if _parse_bool(request.data.get("async", False)):
+            job = enqueue_job(
+                request.user, AiJob.Kind.DELETE_BOX_CARDS, {"box_id": box.id}
             )
-        deleted, _ = Card.objects.filter(box=box, user=request.user).delete()
+            return _job_accepted_response(job)
+        deleted = delete_box_cards(box, request.user)
         return Response({"deleted": deleted})
 
+    @action(detail=True, methods=["get"], url_path="export")
+    def export(self, request, pk=None):
+        box = self.get_object()
+        return _export_response(
+            box_records(box),
+            f"box-{box.id}",
+            _parse_bool(request.query_params.get("gzip", False)),
+        )
+
     @action(detail=True, methods=["post"], url_path="share")
     def share(self, request, pk=None):
         box = self.get_object()
@@ -180,6 +194,7 @@ class BoxViewSet(viewsets.ModelViewSet):
         return Response({"share_code": box.share_code})
 
     @action(detail=False, methods=["post"], url_path="clone")
+    @transaction.atomic
     def clone(self, request):
         code = request.data.get("code", "").strip()
         if not code:
@@ -195,24 +210,14 @@ class BoxViewSet(viewsets.ModelViewSet):
             description=source.description,
         )
 
-        cards = Card.objects.filter(box=source).order_by("created_at")
-        new_cards = [
-            Card(
-                user=request.user,
-                box=new_box,
-                finished=False,
-                level=0,
-                group_id=card.group_id,
-                next_review_time=None,
-                config=card.config,
-            )
-            for card in cards
-        ]
-        if new_cards:
-            Card.objects.bulk_create(new_cards)
+        cloned = clone_box_cards(source, new_box, request.user)
+        record_card_changes(new_box.id, added=[(False, 0)] * cloned)
         return Response({"box_id": new_box.id})
 
 
+IMPORT_FORMATS = {"ndjson": ndjson_rows, "csv": csv_rows}
+
+
 class CardViewSet(viewsets.ModelViewSet):
     serializer_class = CardSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -222,43 +227,12 @@ class CardViewSet(viewsets.ModelViewSet):
             return []
         return [item.strip() for item in value.split(",") if item.strip()]
 
-    def _tts_voice_name(self, language: str | None):
-        lang = (language or "en").strip().lower()
-        if lang in {"de", "de-de", "german"}:
-            return "Klaus22k_nt"
-        return "Ryan22k_NT"
-
-    def _tts_url(self, text: str, language: str | None):
-        encoded = b64encode(text.encode("utf-8")).decode("ascii")
-        voice = self._tts_voice_name(language)
-        return (
-            "https://voice.reverso.net/RestPronunciation.svc/v1/output=json/"
-            f"GetVoiceStream/voiceName={voice}?inputText={encoded}"
-        )
-
-    def _apply_tts(self, config: dict):
-        card_type = config.get("type")
-        if card_type in {"spelling", "word-standard", "multiple-choice"}:
-            text = config.get("text_to_speech")
-            if text and not config.get("voice_file_url"):
-                config["voice_file_url"] = self._tts_url(
-                    text, config.get("text_to_speech_language")
-                )
-        if card_type == "standard":
-            front_text = config.get("front_text_to_speech")
-            if front_text and not config.get("front_voice_file_url"):
-                config["front_voice_file_url"] = self._tts_url(
-                    front_text, config.get("front_text_to_speech_language")
-                )
-            back_text = config.get("back_text_to_speech")
-            if back_text and not config.get("back_voice_file_url"):
-                config["back_voice_file_url"] = self._tts_url(
-                    back_text, config.get("back_text_to_speech_language")
-                )
-        return config
-
     def get_queryset(self):
-        queryset = Card.objects.filter(user=self.request.user).order_by("-created_at")
+        queryset = (
+            Card.objects.filter(user=self.request.user)
+            .select_related("content")
+            .order_by("-created_at")
+        )
         params = self.request.query_params
 
         box_id = params.get("box")
@@ -272,9 +246,9 @@ class CardViewSet(viewsets.ModelViewSet):
         if card_type:
             types = self._split_list_param(card_type)
             if len(types) > 1:
-                queryset = queryset.filter(config__type__in=types)
+                queryset = queryset.filter(card_type__in=types)
             elif types:
-                queryset = queryset.filter(config__type=types[0])
+                queryset = queryset.filter(card_type=types[0])
 
         level = params.get("level")
         if level:
@@ -291,7 +265,7 @@ class CardViewSet(viewsets.ModelViewSet):
 
         group_id = params.get("group_id")
         if group_id:
-            queryset = queryset.filter(group_id__icontains=group_id)
+            queryset = queryset.filter(group_id__trgm_icontains=group_id)
 
         important = params.get("is_important")
         if important is not None:
@@ -306,29 +280,46 @@ class CardViewSet(viewsets.ModelViewSet):
                 finished=False, next_review_time__lte=timezone.now()
             )
 
+        text_query = params.get("q")
+        search = params.get("search")
         order = params.get("order")
-        if order == "next_review_time":
+        if text_query:
+            queryset = search_card_content(
+                queryset, text_query, language=params.get("lang")
+            )
+        elif search:
+            queryset = search_cards(queryset, search)
+        elif order == "next_review_time":
             queryset = queryset.order_by("next_review_time", "created_at")
 
         return queryset
 
+    @transaction.atomic
     def destroy(self, request, *args, **kwargs):
         card = self.get_object()
-        CardAuditLog.objects.create(
-            user=request.user,
-            card=card,
-            action=CardAuditLog.Action.DELETE,
-            before_data=_card_snapshot(card),
-            after_data=None,
+        record_audit(
+            [
+                audit_entry(
+                    user=request.user,
+                    card=card,
+                    action=CardAuditLog.Action.DELETE,
+                    before=card_snapshot(card),
+                    after=None,
+                )
+            ]
         )
-        return super().destroy(request, *args, **kwargs)
+        discard_card_activity([card.id])
+        response = super().destroy(request, *args, **kwargs)
+        record_card_changes(card.box_id, removed=[card_state(card)])
+        return response
 
+    @transaction.atomic
     def perform_create(self, serializer):
         box = serializer.validated_data["box"]
         if box.user_id != self.request.user.id:
             raise ValidationError("Box does not belong to the user.")
         config = serializer.validated_data.get("config", {})
-        config = self._apply_tts(config)
+        config = apply_tts(config)
         group_id = serializer.validated_data.get("group_id", "").strip()
         now = timezone.now()
         should_activate = False
@@ -350,37 +341,64 @@ class CardViewSet(viewsets.ModelViewSet):
             next_review_time=now if should_activate else None,
             finished=False,
         )
-        CardActivity.objects.create(
+        activity = CardActivity.objects.create(
             user=self.request.user,
             card=card,
             action=CardActivity.Action.CREATE,
             card_level=card.level,
         )
-        CardAuditLog.objects.create(
-            user=self.request.user,
-            card=card,
-            action=CardAuditLog.Action.CREATE,
-            before_data=None,
-            after_data=_card_snapshot(card),
+        record_activity([activity])
+        record_audit(
+            [
+                audit_entry(
+                    user=self.request.user,
+                    card=card,
+                    action=CardAuditLog.Action.CREATE,
+                    before=None,
+                    after=card_snapshot(card),
+                )
+            ]
         )
+        record_card_changes(card.box_id, added=[card_state(card)])
 
+    @transaction.atomic
     def perform_update(self, serializer):
-        before = _card_snapshot(serializer.instance)
+        before = card_snapshot(serializer.instance)
+        before_box_id = serializer.instance.box_id
+        before_state = card_state(serializer.instance)
+        new_box = serializer.validated_data.get("box")
+        moved = new_box is not None and new_box.id != before_box_id
+        if moved:
+            discard_card_activity([serializer.instance.id])
         config = serializer.validated_data.get("config")
         if config is not None:
-            config = self._apply_tts(config)
+            config = apply_tts(config)
             serializer.save(config=config)
         else:
             serializer.save()
-        CardAuditLog.objects.create(
-            user=self.request.user,
-            card=serializer.instance,
-            action=CardAuditLog.Action.UPDATE,
-            before_data=before,
-            after_data=_card_snapshot(serializer.instance),
+        record_audit(
+            [
+                audit_entry(
+                    user=self.request.user,
+                    card=serializer.instance,
+                    action=CardAuditLog.Action.UPDATE,
+                    before=before,
+                    after=card_snapshot(serializer.instance),
+                )
+            ]
         )
+        after_state = card_state(serializer.instance)
+        if moved:
+            restore_card_activity([serializer.instance.id])
+            record_card_changes(before_box_id, removed=[before_state])
+            record_card_changes(serializer.instance.box_id, added=[after_state])
+        elif after_state != before_state:
+            record_card_changes(
+                before_box_id, added=[after_state], removed=[before_state]
+            )
 
     @action(detail=False, methods=["post"], url_path="bulk-create")
+    @transaction.atomic
     def bulk_create(self, request):
         box_id = request.data.get("box_id")
         cards = request.data.get("cards", [])
@@ -411,27 +429,13 @@ class CardViewSet(viewsets.ModelViewSet):
         errors = []
         new_cards = []
         for index, payload in enumerate(cards):
-            if not isinstance(payload, dict):
-                errors.append({"index": index, "error": "Card must be an object."})
-                continue
-
-            config = payload.get("config")
-            if config is None:
-                config = dict(payload)
-                payload_group = config.pop("group_id", "")
-            else:
-                payload_group = payload.get("group_id", "")
-
-            resolved_group = payload_group or group_id or ""
-
-            if not isinstance(config, dict):
-                errors.append({"index": index, "error": "Config must be an object."})
-                continue
-            if not config.get("type"):
-                errors.append({"index": index, "error": "Card type is required."})
+            try:
+                config, resolved_group = card_from_payload(payload, group_id)
+            except ValueError as exc:
+                errors.append({"index": index, "error": str(exc)})
                 continue
 
-            config = self._apply_tts(config)
+            config = apply_tts(config)
             should_activate = bool(resolved_group and resolved_group in active_groups)
             new_cards.append(
                 Card(
@@ -449,7 +453,7 @@ class CardViewSet(viewsets.ModelViewSet):
             return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
 
         created_cards = Card.objects.bulk_create(new_cards)
-        CardActivity.objects.bulk_create(
+        activities = CardActivity.objects.bulk_create(
             [
                 CardActivity(
                     user=request.user,
@@ -460,64 +464,156 @@ class CardViewSet(viewsets.ModelViewSet):
                 for card in created_cards
             ]
         )
-        CardAuditLog.objects.bulk_create(
+        record_activity(activities)
+        record_audit(
             [
-                CardAuditLog(
+                audit_entry(
                     user=request.user,
                     card=card,
                     action=CardAuditLog.Action.BULK_CREATE,
-                    before_data=None,
-                    after_data=_card_snapshot(card),
+                    before=None,
+                    after=card_snapshot(card),
                 )
                 for card in created_cards
             ]
         )
+        record_card_changes(box.id, added=[card_state(card) for card in created_cards])
 
         return Response(
             {"created": len(created_cards), "ids": [card.id for card in created_cards]},
             status=status.HTTP_201_CREATED,
         )
 
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_cards(self, request):
+        """Stream NDJSON or CSV cards into a box.
+
+        The body is the file itself (or a multipart ``file``), read line by
+        line and loaded in chunks, so its size is not bounded by memory.
+        Valid rows are imported even when others fail.
+        """
+        params = request.query_params
+        box = self._import_box(request)
+        if request.content_type.startswith("multipart/"):
+            upload = request.FILES.get("file")
+            if upload is None:
+                raise ValidationError({"file": "A file is required."})
+            lines, name = iter(upload), upload.name
+        else:
+            stream = request.stream
+            lines = iter(stream.readline, b"") if stream is not None else iter(())
+            name = ""
+        file_format = params.get("format") or (
+            "csv"
+            if name.lower().endswith(".csv") or "csv" in request.content_type
+            else "ndjson"
+        )
+        if file_format not in IMPORT_FORMATS:
+            raise ValidationError({"format": "Format must be ndjson or csv."})
+
+        importer = CardImporter(
+            request.user,
+            box,
+            group_id=params.get("group_id", ""),
+            prepare_config=apply_tts,
+        ).run(IMPORT_FORMATS[file_format](lines))
+        return self._import_response(importer)
+
+    @action(detail=False, methods=["post"], url_path="import-anki")
+    def import_anki(self, request):
+        """Import an Anki ``.apkg`` package or plain-text (CSV/TSV) export.
+
+        Notes map to ``type`` cards by field order; referenced sounds are
+        stored as uploads and linked as voice files.
+        """
+        params = request.query_params
+        box = self._import_box(request)
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": "A file is required."})
+        card_type = params.get("type", "standard")
+        if card_type not in ANKI_CARD_TYPES:
+            raise ValidationError(
+                {"type": f"Type must be one of: {', '.join(ANKI_CARD_TYPES)}."}
+            )
+
+        rows = anki_rows(
+            upload,
+            upload.name,
+            request.user,
+            card_type=card_type,
+            language=params.get("language", "en"),
+            url_for=lambda media: request.build_absolute_uri(media.file.url),
+        )
+        importer = CardImporter(
+            request.user,
+            box,
+            group_id=params.get("group_id", ""),
+            prepare_config=apply_tts,
+        )
+        try:
+            importer.run(rows)
+        except AnkiImportError as exc:
+            if not importer.created:
+                raise ValidationError({"file": str(exc)})
+            # Earlier chunks are committed; report them with the failure.
+            importer.add_error(None, str(exc))
+        return self._import_response(importer)
+
+    def _import_box(self, request):
+        box_id = request.query_params.get("box_id")
+        if not box_id:
+            raise ValidationError({"box_id": "Box id is required."})
+        try:
+            return Box.objects.get(id=box_id, user=request.user)
+        except (Box.DoesNotExist, ValueError):
+            raise ValidationError({"box_id": "Box does not belong to the user."})
+
+    def _import_response(self, importer):
+        if not importer.created and importer.error_count:
+            return Response(
+                {"errors": importer.errors, "error_count": importer.error_count},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            {
+                "created": importer.created,
+                "errors": importer.errors,
+                "error_count": importer.error_count,
+            }
+        )
+
     @action(detail=True, methods=["post"])
+    @transaction.atomic
     def review(self, request, pk=None):
         card = self.get_object()
         correct = request.data.get("correct")
         if correct is None:
             raise ValidationError({"correct": "This field is required."})
 
-        if isinstance(correct, str):
-            is_correct = correct.strip().lower() in {"1", "true", "yes"}
-        else:
-            is_correct = bool(correct)
-
-        before_snapshot = _card_snapshot(card)
+        is_correct = _parse_bool(correct)
+        before_snapshot = card_snapshot(card)
+        before_state = card_state(card)
         previous_level = card.level
+        scheduler = get_user_scheduler(
+            card.box.scheduler, load_user_parameters(request.user)
+        )
         now = timezone.now()
-        if is_correct:
-            card.level = card.level + 1
-            if card.level > 7:
-                card.level = 8
-                card.finished = True
-                card.next_review_time = None
-            else:
-                schedule_hours = {
-                    1: 0,
-                    2: 12,
-                    3: 24,
-                    4: 48,
-                    5: 96,
-                    6: 168,
-                    7: 336,
-                }
-                hours = schedule_hours.get(card.level, 0)
-                card.next_review_time = now + timedelta(hours=hours)
-        else:
-            card.level = 1
-            card.finished = False
-            card.next_review_time = now
-
-        card.save(update_fields=["level", "finished", "next_review_time", "updated_at"])
-        CardActivity.objects.create(
+        scheduler.review_card(card, is_correct, now)
+        _record_answer(card, is_correct, now)
+
+        card.save(
+            update_fields=[
+                "level",
+                "finished",
+                "ease",
+                "interval_hours",
+                "next_review_time",
+                *ANSWER_COUNTER_FIELDS,
+                "updated_at",
+            ]
+        )
+        activity = CardActivity.objects.create(
             user=request.user,
             card=card,
             action=(
@@ -527,16 +623,188 @@ class CardViewSet(viewsets.ModelViewSet):
             ),
             card_level=previous_level,
         )
-        CardAuditLog.objects.create(
-            user=request.user,
-            card=card,
-            action=CardAuditLog.Action.REVIEW,
-            before_data=before_snapshot,
-            after_data=_card_snapshot(card),
+        record_activity([activity])
+        record_audit(
+            [
+                audit_entry(
+                    user=request.user,
+                    card=card,
+                    action=CardAuditLog.Action.REVIEW,
+                    before=before_snapshot,
+                    after=card_snapshot(card),
+                )
+            ]
+        )
+        record_card_changes(
+            card.box_id, added=[card_state(card)], removed=[before_state]
         )
         serializer = self.get_serializer(card)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["post"], url_path="review-batch")
+    @transaction.atomic
+    def review_batch(self, request):
+        reviews = request.data.get("reviews")
+        if not isinstance(reviews, list) or not reviews:
+            raise ValidationError(
+                {"reviews": "A non-empty list of reviews is required."}
+            )
+
+        now = timezone.now()
+        errors = []
+        entries = []
+        for index, payload in enumerate(reviews):
+            if not isinstance(payload, dict):
+                errors.append({"index": index, "error": "Review must be an object."})
+                continue
+            try:
+                card_id = int(payload.get("card_id"))
+            except (TypeError, ValueError):
+                errors.append({"index": index, "error": "A valid card_id is required."})
+                continue
+            correct = payload.get("correct")
+            if correct is None:
+                errors.append({"index": index, "error": "correct is required."})
+                continue
+            answered_at = now
+            raw_answered_at = payload.get("answered_at")
+            if raw_answered_at:
+                answered_at = (
+                    parse_datetime(raw_answered_at)
+                    if isinstance(raw_answered_at, str)
+                    else None
+                )
+                if answered_at is None:
+                    errors.append(
+                        {"index": index, "error": "answered_at must be a datetime."}
+                    )
+                    continue
+                if timezone.is_naive(answered_at):
+                    answered_at = timezone.make_aware(answered_at)
+                answered_at = min(answered_at, now)
+            entries.append((index, card_id, _parse_bool(correct), answered_at))
+
+        # Only the cards are locked; locking their boxes as well would
+        # serialize every concurrent review in the same box. Shared content
+        # is joined for the audit snapshots.
+        cards = (
+            Card.objects.select_for_update(of=("self",))
+            .select_related("box", "content")
+            .filter(user=request.user, id__in={entry[1] for entry in entries})
+            .in_bulk()
+        )
+        for index, card_id, _, _ in entries:
+            if card_id not in cards:
+                errors.append({"index": index, "error": "Card not found."})
+
+        if errors:
+            errors.sort(key=lambda error: error["index"])
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        initial_states = {card.id: card_state(card) for card in cards.values()}
+        user_params = load_user_parameters(request.user)
+        schedulers = {}
+        # A card may be reviewed several times in one batch. Reviews are
+        # applied in rounds holding at most one review per card, in request
+        # order, and each round is one ``review_many`` call per scheduler.
+        rounds = []
+        occurrences = {}
+        for entry in entries:
+            occurrence = occurrences.get(entry[1], 0)
+            occurrences[entry[1]] = occurrence + 1
+            if occurrence == len(rounds):
+                rounds.append({})
+            scheduler_name = cards[entry[1]].box.scheduler
+            rounds[occurrence].setdefault(scheduler_name, []).append(entry)
+
+        outcomes = []
+        for groups in rounds:
+            for scheduler_name, group in groups.items():
+                if scheduler_name not in schedulers:
+                    schedulers[scheduler_name] = get_user_scheduler(
+                        scheduler_name, user_params
+                    )
+                group_cards = [cards[card_id] for _, card_id, _, _ in group]
+                before = [(card.level, card_snapshot(card)) for card in group_cards]
+                schedulers[scheduler_name].review_cards(
+                    group_cards,
+                    [is_correct for _, _, is_correct, _ in group],
+                    [answered_at for _, _, _, answered_at in group],
+                )
+                for entry, card, (previous_level, before_snapshot) in zip(
+                    group, group_cards, before
+                ):
+                    index, _, is_correct, answered_at = entry
+                    _record_answer(card, is_correct, answered_at)
+                    card.updated_at = now
+                    result = {
+                        "index": index,
+                        "card_id": card.id,
+                        "correct": is_correct,
+                        "previous_level": previous_level,
+                        "level": card.level,
+                        "finished": card.finished,
+                        "next_review_time": card.next_review_time,
+                    }
+                    outcomes.append(
+                        (result, card, before_snapshot, card_snapshot(card))
+                    )
+        outcomes.sort(key=lambda outcome: outcome[0]["index"])
+
+        activities = []
+        audit_logs = []
+        results = []
+        for result, card, before, after in outcomes:
+            activities.append(
+                CardActivity(
+                    user=request.user,
+                    card=card,
+                    action=(
+                        CardActivity.Action.ANSWER_CORRECT
+                        if result["correct"]
+                        else CardActivity.Action.ANSWER_INCORRECT
+                    ),
+                    card_level=result["previous_level"],
+                )
+            )
+            audit_logs.append(
+                audit_entry(
+                    user=request.user,
+                    card=card,
+                    action=CardAuditLog.Action.REVIEW,
+                    before=before,
+                    after=after,
+                    metadata={"source": "review_batch"},
+                )
+            )
+            results.append(result)
+
+        reviewed = [cards[card_id] for card_id in initial_states]
+        Card.objects.bulk_update(
+            reviewed,
+            [
+                "level",
+                "finished",
+                "ease",
+                "interval_hours",
+                "next_review_time",
+                *ANSWER_COUNTER_FIELDS,
+                "updated_at",
+            ],
+        )
+        record_activity(CardActivity.objects.bulk_create(activities))
+        record_audit(audit_logs)
+
+        changes_by_box = {}
+        for card in reviewed:
+            added, removed = changes_by_box.setdefault(card.box_id, ([], []))
+            added.append(card_state(card))
+            removed.append(initial_states[card.id])
+        for box_id, (added, removed) in changes_by_box.items():
+            record_card_changes(box_id, added=added, removed=removed)
+
+        return Response({"reviewed": len(results), "results": results})
+
     @action(detail=True, methods=["post"], url_path="ai-review")
     def ai_review(self, request, pk=None):
         card = self.get_object()
@@ -544,39 +812,47 @@ class CardViewSet(viewsets.ModelViewSet):
         if not isinstance(answer, str) or not answer.strip():
             raise ValidationError({"answer": "Answer text is required."})
 
-        # TODO: Replace this stub with real AI evaluation logic.
-        client = genai.Client()
-        prompt = f"""
-        {prompt_ai_review}
+        if _parse_bool(request.data.get("async", False)):
+            job = enqueue_job(
+                request.user,
+                AiJob.Kind.AI_REVIEW,
+                {"card_id": card.id, "answer": answer, "card_level": card.level},
+            )
+            return _job_accepted_response(job)
 
-        ==================
-        task details:
-        {card.config["validate_answer_promt"]}
+        review_data = run_ai_review(request.user, card, answer)
+        return Response(review_data)
 
-        ==================
-        user input:
-        {answer}
-        """
-        response = client.models.generate_content(
-            model="gemini-3-flash-preview",
-            contents=prompt,
-            config={
-                "response_mime_type": "application/json",
-                "response_json_schema": Review.model_json_schema(),
-            },
-        )
-
-        review = Review.model_validate_json(response.text)
-        review_data = review.model_dump()
-        AiReviewLog.objects.create(
-            user=request.user,
-            card=card,
-            card_level=card.level,
-            answer=answer,
-            review=review_data,
-        )
+    @action(detail=True, methods=["get"], url_path="history")
+    def history(self, request, pk=None):
+        card = self.get_object()
+        raw_at = request.query_params.get("at")
+        if raw_at:
+            at = parse_datetime(raw_at)
+            if at is None:
+                raise ValidationError({"at": "A valid datetime is required."})
+            if timezone.is_naive(at):
+                at = timezone.make_aware(at)
+            return Response({"at": at, "state": card_history(card, at=at)})
 
-        return Response(review_data)
+        try:
+            limit = int(request.query_params.get("limit", 50))
+        except (TypeError, ValueError):
+            raise ValidationError({"limit": "A valid number is required."})
+        if limit <= 0 or limit > 200:
+            raise ValidationError({"limit": "Limit must be between 1 and 200."})
+        results = [
+            {
+                "id": log.id,
+                "action": log.action,
+                "created_at": log.created_at,
+                "metadata": log.metadata,
+                "changes": log.changes,
+                "state": state,
+            }
+            for log, state in card_history(card, limit=limit)
+        ]
+        return Response({"results": results})
 
     @action(detail=False, methods=["get"], url_path="ready-summary")
     def ready_summary(self, request):
@@ -596,9 +872,9 @@ class CardViewSet(viewsets.ModelViewSet):
         if card_type:
             types = self._split_list_param(card_type)
             if len(types) > 1:
-                queryset = queryset.filter(config__type__in=types)
+                queryset = queryset.filter(card_type__in=types)
             elif types:
-                queryset = queryset.filter(config__type=types[0])
+                queryset = queryset.filter(card_type=types[0])
 
         level = params.get("level")
         if level:
@@ -615,7 +891,7 @@ class CardViewSet(viewsets.ModelViewSet):
 
         levels = list(queryset.order_by().values_list("level", flat=True).distinct())
         types = list(
-            queryset.order_by().values_list("config__type", flat=True).distinct()
+            queryset.order_by().values_list("card_type", flat=True).distinct()
         )
         return Response({"count": queryset.count(), "levels": levels, "types": types})
 
@@ -636,47 +912,22 @@ class ExerciseViewSet(viewsets.ModelViewSet):
         )
         search = self.request.query_params.get("search")
         if search:
-            queryset = queryset.filter(title__icontains=search)
+            queryset = queryset.filter(title__trgm_icontains=search)
         return queryset
 
     def perform_create(self, serializer):
         exercise = serializer.save(user=self.request.user)
         if not exercise.exercises:
-            self._generate_exercises(exercise)
+            request_exercise_generation([exercise], replace=True)
 
     def perform_update(self, serializer):
         previous_prompt = serializer.instance.question_making_prompt
         exercise = serializer.save()
         if exercise.question_making_prompt != previous_prompt:
-            self._generate_exercises(exercise)
+            request_exercise_generation([exercise], replace=True)
             return
         if not exercise.exercises:
-            self._generate_exercises(exercise)
-
-    def _generate_exercises(self, exercise: Exercise):
-        client = genai.Client()
-        prompt = f"""
-        {prompt_exercise_questions}
-
-        ==================
-        exercise prompt:
-        {exercise.question_making_prompt}
-
-        ==================
-        instructions:
-        Generate 10 exercises for the topic that I give you.
-        """
-        response = client.models.generate_content(
-            model="gemini-3-flash-preview",
-            contents=prompt,
-            config={
-                "response_mime_type": "application/json",
-                "response_json_schema": ExerciseItems.model_json_schema(),
-            },
-        )
-        exercises = ExerciseItems.model_validate_json(response.text)
-        exercise.exercises = exercises.exercises
-        exercise.save(update_fields=["exercises", "updated_at"])
+            request_exercise_generation([exercise])
 
     @action(detail=False, methods=["post"], url_path="bulk-create")
     def bulk_create(self, request):
@@ -728,9 +979,10 @@ class ExerciseViewSet(viewsets.ModelViewSet):
             return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
 
         created = Exercise.objects.bulk_create(exercises)
-        for exercise in created:
-            if not exercise.exercises:
-                self._generate_exercises(exercise)
+        request_exercise_generation(
+            [exercise for exercise in created if not exercise.exercises],
+            replace=True,
+        )
         serializer = ExerciseSerializer(created, many=True)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -745,59 +997,40 @@ class ExerciseViewSet(viewsets.ModelViewSet):
         if not isinstance(answer, str) or not answer.strip():
             raise ValidationError({"answer": "Answer is required."})
 
-        client = genai.Client()
-        prompt = f"""
-        evaluation prompt:
-        {exercise.evaluate_prompt}
-
-        ==================
-        question:
-        {question}
-
-        ==================
-        user input:
-        {answer}
-        """
-        response = client.models.generate_content(
-            model="gemini-3-flash-preview",
-            contents=prompt,
-            config={
-                "response_mime_type": "application/json",
-                "response_json_schema": ExerciseReview.model_json_schema(),
-            },
-        )
-        review = ExerciseReview.model_validate_json(response.text)
-        review_data = review.model_dump()
-
-        ExerciseHistory.objects.create(
-            user=request.user,
-            exercise=exercise,
-            question=question,
-            answer=answer,
-            review=review_data,
-            score=review_data.get("score", 0),
-        )
+        if _parse_bool(request.data.get("async", False)):
+            job = enqueue_job(
+                request.user,
+                AiJob.Kind.EXERCISE_EVALUATE,
+                {"exercise_id": exercise.id, "question": question, "answer": answer},
+            )
+            return _job_accepted_response(job)
 
+        review_data = run_exercise_evaluation(request.user, exercise, question, answer)
         return Response(review_data)
 
     @action(detail=True, methods=["post"], url_path="complete")
+    @transaction.atomic
     def complete(self, request, pk=None):
         exercise = self.get_object()
         question: str = request.data.get("question", "")
         if not isinstance(question, str) or not question.strip():
             raise ValidationError({"question": "Question is required."})
 
-        exercises = list(exercise.exercises or [])
+        # Locked so a batch the worker appends meanwhile is not overwritten.
+        locked = Exercise.objects.select_for_update().get(id=exercise.id)
+        exercises = list(locked.exercises or [])
         try:
             exercises.remove(question)
         except ValueError:
             raise ValidationError({"question": "Question not found in exercise."})
 
-        exercise.exercises = exercises
-        exercise.save(update_fields=["exercises", "updated_at"])
+        locked.exercises = exercises
+        locked.save(update_fields=["exercises", "updated_at"])
+        exercise.exercises = locked.exercises
+        exercise.updated_at = locked.updated_at
 
-        if not exercise.exercises:
-            self._generate_exercises(exercise)
+        if len(exercise.exercises) <= EXERCISE_LOW_WATERMARK:
+            request_exercise_generation([exercise])
 
         serializer = self.get_serializer(exercise)
         return Response(serializer.data)
@@ -817,6 +1050,54 @@ class ExerciseViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+class AiJobViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = AiJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return AiJob.objects.filter(user=self.request.user).order_by("-created_at")
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="client-stats",
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def client_stats(self, request):
+        return Response(get_provider().stats())
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="cache-stats",
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def cache_stats(self, request):
+        stored = AiCacheEntry.objects.aggregate(
+            entries=Count("id"), hits=Sum("hits")
+        )
+        return Response(
+            {
+                **get_cache().stats(),
+                "stored_entries": stored["entries"],
+                "stored_hits": stored["hits"] or 0,
+            }
+        )
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """Full NDJSON export of the user's boxes, cards, history and exercises."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request):
+        return _export_response(
+            user_records(request.user),
+            f"flashcards-{request.user.id}",
+            _parse_bool(request.query_params.get("gzip", False)),
+        )
+
+
 class ActivityViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -826,81 +1107,71 @@ class ActivityViewSet(viewsets.ViewSet):
             raise ValidationError({"interval": "Use day, week, or month."})
 
         box_id = request.query_params.get("box")
-        queryset = CardActivity.objects.filter(user=request.user)
+        queryset = ActivityRollup.objects.filter(user=request.user)
         if box_id:
             try:
-                queryset = queryset.filter(card__box_id=int(box_id))
+                queryset = queryset.filter(box_id=int(box_id))
             except (TypeError, ValueError):
                 pass
 
-        now = timezone.now()
+        # Rollup days are already in the user's time zone.
+        today = timezone.localdate(timezone=user_timezone(request.user))
         if interval == "day":
             count = 30
-            start = now.date() - timedelta(days=count - 1)
+            start = today - timedelta(days=count - 1)
             buckets = [start + timedelta(days=i) for i in range(count)]
-            trunc = TruncDay("created_at")
+            trunc = F("day")
             label_format = "%b %d"
         elif interval == "week":
             count = 24
-            week_start = now.date() - timedelta(days=now.weekday())
+            week_start = today - timedelta(days=today.weekday())
             start = week_start - timedelta(weeks=count - 1)
             buckets = [start + timedelta(weeks=i) for i in range(count)]
-            trunc = TruncWeek("created_at")
+            trunc = TruncWeek("day")
             label_format = "%b %d"
         else:
             count = 12
-            current = date(now.year, now.month, 1)
+            current = date(today.year, today.month, 1)
             buckets = [current]
             while len(buckets) < count:
                 month = buckets[0].month - 1 or 12
                 year = buckets[0].year - (1 if buckets[0].month == 1 else 0)
                 buckets.insert(0, date(year, month, 1))
-            trunc = TruncMonth("created_at")
+            trunc = TruncMonth("day")
             label_format = "%b %y"
 
-        activated_qs = (
-            queryset.filter(action=CardActivity.Action.ACTIVATE)
-            .annotate(bucket=trunc)
-            .values("bucket")
-            .annotate(count=Count("id"))
-        )
-        checked_qs = (
-            queryset.filter(
-                action__in=[
-                    CardActivity.Action.ANSWER_CORRECT,
-                    CardActivity.Action.ANSWER_INCORRECT,
-                ]
-            )
+        # Daily rollups are summed into buckets, so the cost depends on the
+        # number of buckets rather than on the raw activity volume.
+        rows = (
+            queryset.filter(day__gte=buckets[0])
             .annotate(bucket=trunc)
-            .values("bucket")
-            .annotate(count=Count("id"))
-        )
-        levels_qs = (
-            queryset.filter(
-                action__in=[
-                    CardActivity.Action.ANSWER_CORRECT,
-                    CardActivity.Action.ANSWER_INCORRECT,
-                ]
-            )
-            .annotate(bucket=trunc)
-            .values("bucket", "card_level")
-            .annotate(count=Count("id"))
+            .order_by()
+            .values("bucket", "action", "card_level")
+            .annotate(total=Sum("count"))
         )
 
         def normalize_bucket(value):
             return value.date() if hasattr(value, "date") else value
 
-        activated_map = {
-            normalize_bucket(entry["bucket"]): entry["count"] for entry in activated_qs
-        }
-        checked_map = {
-            normalize_bucket(entry["bucket"]): entry["count"] for entry in checked_qs
-        }
+        activated_map = {}
+        checked_map = {}
         level_counts = {}
-        for entry in levels_qs:
+        for entry in rows:
             bucket_value = normalize_bucket(entry["bucket"])
-            level_counts.setdefault(bucket_value, {})
-            level_counts[bucket_value][str(entry["card_level"])] = entry["count"]
+            if entry["action"] == CardActivity.Action.ACTIVATE:
+                activated_map[bucket_value] = (
+                    activated_map.get(bucket_value, 0) + entry["total"]
+                )
+            elif entry["action"] in (
+                CardActivity.Action.ANSWER_CORRECT,
+                CardActivity.Action.ANSWER_INCORRECT,
+            ):
+                checked_map[bucket_value] = (
+                    checked_map.get(bucket_value, 0) + entry["total"]
+                )
+                bucket_levels = level_counts.setdefault(bucket_value, {})
+                level = str(entry["card_level"])
+                bucket_levels[level] = bucket_levels.get(level, 0) + entry["total"]
 
         labels = []
         activated_series = []
@@ -931,78 +1202,188 @@ class ActivityViewSet(viewsets.ViewSet):
     @action(detail=False, methods=["get"], url_path="challenging")
     def challenging(self, request):
         box_id = request.query_params.get("box")
-        queryset = CardActivity.objects.filter(
-            user=request.user,
-            action=CardActivity.Action.ANSWER_INCORRECT,
-        )
+        queryset = Card.objects.filter(user=request.user, incorrect_count__gt=0)
         if box_id:
             try:
-                queryset = queryset.filter(card__box_id=int(box_id))
+                queryset = queryset.filter(box_id=int(box_id))
             except (TypeError, ValueError):
                 pass
-
-        challenging = (
-            queryset.values("card_id", "card__config", "card__box_id")
-            .annotate(
-                incorrect_count=Count("id"),
-                correct_count=Count(
-                    Case(
-                        When(
-                            card__activities__action=CardActivity.Action.ANSWER_CORRECT,
-                            then=1,
-                        ),
-                        output_field=IntegerField(),
-                    )
-                ),
+        queryset = (
+            queryset.select_related("content")
+            .order_by("-incorrect_count", "-correct_count", "id")
+            .only(
+                "id",
+                "box_id",
+                "own_config",
+                "content",
+                "content__config",
+                "display_text",
+                "correct_count",
+                "incorrect_count",
+                "last_answered_at",
             )
-            .order_by("-incorrect_count", "-correct_count")
         )
 
+        paginator = StandardResultsSetPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
         results = [
             {
-                "card_id": item["card_id"],
-                "box_id": item["card__box_id"],
-                "incorrect_count": item["incorrect_count"],
-                "config": item["card__config"],
-                "display": _card_display(item["card__config"]),
+                "card_id": card.id,
+                "box_id": card.box_id,
+                "incorrect_count": card.incorrect_count,
+                "correct_count": card.correct_count,
+                "last_answered_at": card.last_answered_at,
+                "config": card.config,
+                "display": card.display_text,
             }
-            for item in challenging
+            for card in page
         ]
-        return Response({"results": results})
+        return paginator.get_paginated_response(results)
+
+    @action(detail=False, methods=["get"], url_path="forecast")
+    def forecast(self, request):
+        params = request.query_params
+        interval = params.get("interval", "day")
+        if interval not in {"day", "hour"}:
+            raise ValidationError({"interval": "Use day or hour."})
+        max_days = 90 if interval == "day" else 14
+        try:
+            days = int(params.get("days", 7))
+        except (TypeError, ValueError):
+            raise ValidationError({"days": "A valid number is required."})
+        if days <= 0 or days > max_days:
+            raise ValidationError(
+                {"days": f"Days must be between 1 and {max_days}."}
+            )
+        simulate = params.get("simulate") == "1"
+
+        box = None
+        box_id = params.get("box")
+        if box_id:
+            try:
+                box = Box.objects.get(id=int(box_id), user=request.user)
+            except (TypeError, ValueError, Box.DoesNotExist):
+                raise ValidationError({"box": "Box does not belong to the user."})
+
+        tzinfo = user_timezone(request.user)
+        now = timezone.localtime(timezone=tzinfo)
+        if interval == "day":
+            start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            step = timedelta(days=1)
+            count = days
+            label_format = "%b %d"
+        else:
+            start = now.replace(minute=0, second=0, microsecond=0)
+            step = timedelta(hours=1)
+            count = days * 24
+            label_format = "%b %d %H:00"
+        end = start + step * count
+
+        queryset = Card.objects.filter(
+            user=request.user, finished=False, next_review_time__lt=end
+        )
+        if box is not None:
+            queryset = queryset.filter(box=box)
+        # Overdue cards are counted as due now.
+        due_at = Greatest("next_review_time", Value(now))
+
+        labels = [(start + step * i).strftime(label_format) for i in range(count)]
+        if not simulate:
+            if interval == "day":
+                trunc = TruncDay(due_at, tzinfo=tzinfo)
+            else:
+                trunc = TruncHour(due_at, tzinfo=tzinfo)
+            rows = (
+                queryset.annotate(bucket=trunc)
+                .order_by()
+                .values("bucket")
+                .annotate(count=Count("id"))
+            )
+            due = [0] * count
+            for row in rows:
+                if interval == "day":
+                    # Day lengths vary across DST changes; compare dates.
+                    index = (row["bucket"].date() - start.date()).days
+                else:
+                    index = int((row["bucket"] - start) / step)
+                if 0 <= index < count:
+                    due[index] += row["count"]
+            return Response({"interval": interval, "labels": labels, "due": due})
+
+        hours = int((end - start) / timedelta(hours=1))
+        initial = np.zeros((hours, FINISHED_LEVEL + 1))
+        rows = (
+            queryset.annotate(bucket=TruncHour(due_at, tzinfo=tzinfo))
+            .order_by()
+            .values("bucket", "level")
+            .annotate(count=Count("id"))
+        )
+        for row in rows:
+            index = int((row["bucket"] - start) / timedelta(hours=1))
+            if 0 <= index < hours:
+                initial[index, min(row["level"], FINISHED_LEVEL)] += row["count"]
+
+        activities = CardActivity.objects.filter(user=request.user)
+        if box is not None:
+            activities = activities.filter(card__box=box)
+        scheduler = get_user_scheduler(
+            box.scheduler if box is not None else None,
+            load_user_parameters(request.user),
+        )
+        projected = simulate_reviews(
+            initial, level_intervals(scheduler), pass_rates(activities)
+        )
+
+        per_bucket = hours // count
+        due = initial.sum(axis=1).reshape(count, per_bucket).sum(axis=1)
+        projected = projected.reshape(count, per_bucket).sum(axis=1)
+        return Response(
+            {
+                "interval": interval,
+                "labels": labels,
+                "due": [int(value) for value in due],
+                "projected": [round(float(value), 1) for value in projected],
+            }
+        )
+
+
+def _export_response(records, name, compress):
+    """Stream ``records`` as an NDJSON attachment, optionally gzipped."""
+    response = StreamingHttpResponse(
+        stream_ndjson(records, compress=compress),
+        content_type="application/gzip" if compress else "application/x-ndjson",
+    )
+    filename = f"{name}.ndjson.gz" if compress else f"{name}.ndjson"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _job_accepted_response(job: AiJob):
+    return Response(
+        {
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": reverse("ai-job-detail", args=[job.id]),
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+ANSWER_COUNTER_FIELDS = ("correct_count", "incorrect_count", "last_answered_at")
+
+
+def _record_answer(card: Card, is_correct: bool, answered_at):
+    if is_correct:
+        card.correct_count += 1
+    else:
+        card.incorrect_count += 1
+    card.last_answered_at = answered_at
 
 
-def _card_snapshot(card: Card):
-    return {
-        "id": card.id,
-        "box_id": card.box_id,
-        "finished": card.finished,
-        "level": card.level,
-        "group_id": card.group_id,
-        "next_review_time": card.next_review_time.isoformat()
-        if card.next_review_time
-        else None,
-        "is_important": card.is_important,
-        "config": card.config,
-    }
-
-
-def _card_display(config: dict):
-    if not isinstance(config, dict):
-        return ""
-    card_type = config.get("type")
-    if card_type == "standard":
-        return config.get("front") or config.get("back") or ""
-    if card_type == "spelling":
-        return config.get("spelling") or config.get("front") or ""
-    if card_type == "word-standard":
-        return config.get("word") or config.get("back") or ""
-    if card_type == "multiple-choice":
-        return config.get("question") or ""
-    if card_type == "ai-reviewer":
-        return config.get("question") or ""
-    if card_type == "german-verb-conjugator":
-        return config.get("verb") or ""
-    return ""
+def _parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in {"1", "true", "yes"}
+    return bool(value)
 
 
 # Create your views here.
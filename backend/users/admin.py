@@ -4,7 +4,7 @@ from .models import Profile
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
-    list_display = ("id", "user", "avatar")
+    list_display = ("id", "user", "avatar", "timezone")
     search_fields = ("user__email",)
 
 # Register your models here.
@@ -1,5 +1,8 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 from django.conf import settings
 from django.db import models
+from django.utils.timezone import get_default_timezone
 
 
 class Profile(models.Model):
@@ -13,6 +16,14 @@ class Profile(models.Model):
         on_delete=models.SET_NULL,
         related_name="profile_avatars",
     )
+    timezone = models.CharField(max_length=64, default="UTC")
 
     def __str__(self):
         return f"Profile for {self.user_id}"
+
+    @property
+    def tzinfo(self):
+        try:
+            return ZoneInfo(self.timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            return get_default_timezone()
@@ -1,3 +1,5 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 from django.contrib.auth.models import User
 from rest_framework import serializers
 from uploads.models import Upload
@@ -17,7 +19,7 @@ class ProfileSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Profile
-        fields = ("name", "email", "avatar_id", "avatar_url")
+        fields = ("name", "email", "avatar_id", "avatar_url", "timezone")
 
     def get_avatar_url(self, obj):
         if not obj.avatar:
@@ -32,6 +34,13 @@ class ProfileSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Avatar must belong to the user.")
         return value
 
+    def validate_timezone(self, value):
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError("Unknown time zone.")
+        return value
+
     def update(self, instance, validated_data):
         user_data = validated_data.pop("user", None)
         if user_data:
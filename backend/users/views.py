@@ -1,6 +1,8 @@
+from django.db import transaction
 from rest_framework import generics, permissions
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
+from study.jobs import request_rollup_rebuild
 from .serializers import (
     ChangePasswordSerializer,
     EmailTokenObtainPairSerializer,
@@ -27,6 +29,15 @@ class ProfileView(generics.RetrieveUpdateAPIView):
         profile, _ = Profile.objects.get_or_create(user=self.request.user)
         return profile
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous_timezone = serializer.instance.timezone
+        profile = serializer.save()
+        if profile.timezone != previous_timezone:
+            # Activity days are bucketed in the user's time zone; re-bucketing
+            # the whole history is left to the job queue.
+            request_rollup_rebuild(profile.user)
+
 
 class ChangePasswordView(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]